@@ -0,0 +1,177 @@
+from datetime import datetime
+import argparse, asyncio, json, os, shutil, tempfile, threading, time
+import mock_site
+from file import KHCJudgmentDownloader, AsyncKHCCrawler, RequestGovernor, process_tree_rss
+
+# End-to-end throughput benchmark: serves a mock KHC site locally, runs a crawler against it and reports
+# cases/minute, PDFs/minute, time per navigation level and peak RSS (crawler plus browser processes).
+# Each run is appended to a JSON-lines file so results can be compared from run to run.
+
+SELENIUM_LEVELS = {"navigate_to_website": "page", "select_category": "category", "process_year": "year", "process_month_table": "months",
+                   "download_case_files": "cases", "click_row_button": "click", "click_back_button": "back", "download_pdf_file": "pdf", "fetch_pdf": "pdf"}
+ASYNC_LEVELS = {"crawl_category": "category", "crawl_year": "year", "crawl_cases": "cases", "open_button": "click", "fetch_pdf": "pdf"}
+
+
+class RSSSampler(threading.Thread):
+    # Samples this process and all of its descendants (chromedriver, Chrome renderers)
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak_bytes = 0
+        self.stopped = threading.Event()
+
+    def tree_rss(self):
+        return process_tree_rss(os.getpid()) or 0
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.tree_rss())
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.peak_bytes = max(self.peak_bytes, self.tree_rss())
+
+
+def time_methods(obj, levels, timings):
+    for name, level in levels.items():
+        original = getattr(obj, name, None)
+        if original is None: continue
+        stats = timings.setdefault(level, {"count": 0, "seconds": 0.0})
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, _original=original, _stats=stats, **kwargs):
+                start = time.perf_counter()
+                try: return await _original(*args, **kwargs)
+                finally:
+                    _stats["count"] += 1
+                    _stats["seconds"] += time.perf_counter() - start
+        else:
+            def timed(*args, _original=original, _stats=stats, **kwargs):
+                start = time.perf_counter()
+                try: return _original(*args, **kwargs)
+                finally:
+                    _stats["count"] += 1
+                    _stats["seconds"] += time.perf_counter() - start
+        setattr(obj, name, timed)
+
+
+def count_cases(downloader):
+    # download_case_files returns (cases, files) per month/year; keep a running total of the cases
+    totals = {"cases": 0}
+    original = downloader.download_case_files
+    def counted(*args, **kwargs):
+        cases, files = original(*args, **kwargs)
+        totals["cases"] += cases
+        return cases, files
+    downloader.download_case_files = counted
+    return totals
+
+
+def run_benchmark(args):
+    site = mock_site.MockSite(args.categories, args.years, args.months, args.cases, args.pdfs, args.pdf_kb, args.page_length,
+                              args.latency_ms, args.jitter_ms, args.fail_rate, args.pdf_fail_rate, args.popup_rate, args.seed)
+    server, url = mock_site.start_server(site)
+    download_dir = args.download_dir or tempfile.mkdtemp(prefix="khc_bench_")
+    timings = {}
+    # The production governor unless --ungoverned; retries and the concurrency cap apply either way
+    governor = RequestGovernor(max_concurrency=args.max_concurrency, max_rate=args.max_rate, adaptive=not args.ungoverned)
+    sampler = RSSSampler()
+    sampler.start()
+    start_time = time.perf_counter()
+    try:
+        if args.engine == "async":
+            crawler = AsyncKHCCrawler(download_dir, base_url=url, concurrency=args.concurrency, download_concurrency=args.download_workers, selenium_fallback=False, governor=governor)
+            time_methods(crawler, ASYNC_LEVELS, timings)
+            cases = crawler.run()['total_cases']
+        else:
+            downloader = KHCJudgmentDownloader(download_dir, base_url=url, download_mode=args.download_mode, download_workers=args.download_workers,
+                                               headless=args.headless, block_resources=args.block_resources, page_load_strategy=args.page_load_strategy, governor=governor)
+            totals = count_cases(downloader)
+            time_methods(downloader, SELENIUM_LEVELS, timings)
+            downloader.run()
+            cases = totals["cases"]
+    finally:
+        wall_seconds = time.perf_counter() - start_time
+        sampler.stop()
+        server.shutdown()
+    pdfs = 0
+    for root, dirs, files in os.walk(download_dir):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]  # skip .objects and .staging copies
+        pdfs += sum(1 for name in files if name.endswith(".pdf"))
+    if not args.download_dir and not args.keep: shutil.rmtree(download_dir, ignore_errors=True)
+    return {
+        "label": args.label, "engine": args.engine, "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("label", "results", "download_dir", "keep")},
+        "expected_cases": site.total_cases(), "cases": cases, "pdfs": pdfs, "requests": site.requests,
+        "wall_seconds": round(wall_seconds, 3),
+        "cases_per_minute": round(cases * 60 / wall_seconds, 2) if wall_seconds else 0,
+        "pdfs_per_minute": round(pdfs * 60 / wall_seconds, 2) if wall_seconds else 0,
+        "levels": {level: {"count": stats["count"], "seconds": round(stats["seconds"], 3), "mean_ms": round(stats["seconds"] * 1000 / stats["count"], 2) if stats["count"] else 0}
+                   for level, stats in timings.items()},
+        "peak_rss_mb": round(sampler.peak_bytes / 2 ** 20, 1),
+    }
+
+
+def previous_result(results_file, label):
+    if not os.path.exists(results_file): return None
+    previous = None
+    with open(results_file, encoding="utf-8") as f:
+        for line in f:
+            try: result = json.loads(line)
+            except ValueError: continue
+            if result.get("label") == label: previous = result
+    return previous
+
+
+def report(result, previous):
+    print(f"\n=== Benchmark '{result['label']}' ({result['engine']}) ===")
+    print(f"Cases: {result['cases']}/{result['expected_cases']}   PDFs: {result['pdfs']}   Requests: {result['requests']}")
+    for key in ("wall_seconds", "cases_per_minute", "pdfs_per_minute", "peak_rss_mb"):
+        line = f"{key:>18}: {result[key]}"
+        if previous and previous.get(key):
+            line += f"   (previous {previous[key]}, {(result[key] - previous[key]) * 100 / previous[key]:+.1f}%)"
+        print(line)
+    print("Time per navigation level (inclusive of nested levels):")
+    for level, stats in sorted(result["levels"].items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {level:>10}: {stats['count']:>6} calls  {stats['seconds']:>9.3f}s total  {stats['mean_ms']:>9.2f} ms mean")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the KHC crawler against a local mock site")
+    parser.add_argument("--label", default="default", help="name used to compare against earlier runs")
+    parser.add_argument("--results", default="bench_results.jsonl")
+    parser.add_argument("--engine", choices=["selenium", "async"], default="selenium")
+    parser.add_argument("--download-dir")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary download directory")
+    parser.add_argument("--download-mode", choices=["browser", "http"], default="browser")
+    parser.add_argument("--download-workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4, help="page request concurrency for the async engine")
+    parser.add_argument("--ungoverned", action="store_true", help="do not pace requests, to measure the crawler alone")
+    parser.add_argument("--max-rate", type=float, default=10.0, help="governor ceiling in requests/second per host")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="governor ceiling in concurrent requests per host")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--block-resources", action="store_true")
+    parser.add_argument("--page-load-strategy", default="normal")
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--cases", type=int, default=5)
+    parser.add_argument("--pdfs", type=int, default=1)
+    parser.add_argument("--pdf-kb", type=int, default=20)
+    parser.add_argument("--page-length", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--pdf-fail-rate", type=float, default=0.0)
+    parser.add_argument("--popup-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run_benchmark(args)
+    report(result, previous_result(args.results, args.label))
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,1195 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time, os, shutil, logging, json, glob
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote, urljoin
+import time, os, shutil, logging, json, hashlib, queue, threading, sqlite3, re, asyncio, functools, random, socket, argparse, multiprocessing
+import urllib3
 from datetime import datetime
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+try:
+    import aiohttp
+    import lxml.html
+except ImportError:
+    aiohttp = None
 
-class KHCJudgmentDownloader:
-    def __init__(self, download_dir=None, resume=False):
+BASE_URL = "https://judiciary.karnataka.gov.in/ds_judgment.php"
+
+AJAX_IDLE_JS = "return arguments[0].indexOf(document.readyState) !== -1 && (!window.jQuery || jQuery.active === 0);"
+DRAW_COUNT_JS = """
+var id = arguments[0];
+if (!window.jQuery || !jQuery.fn.dataTable || !jQuery.fn.dataTable.isDataTable('#' + id)) return -1;
+window.__khcDraws = window.__khcDraws || {};
+if (!(id in window.__khcDraws)) {
+    window.__khcDraws[id] = 0;
+    jQuery('#' + id).on('draw.dt', function() { window.__khcDraws[id]++; });
+}
+return window.__khcDraws[id];
+"""
+TABLE_SNAPSHOT_JS = """
+var table = document.getElementById(arguments[0]);
+if (!table) return [];
+return Array.from(table.querySelectorAll('tbody > tr')).map(function(tr, index) {
+    var cells = Array.from(tr.children);
+    return {
+        index: index,
+        cells: cells.map(function(td) { return td.innerText.trim(); }),
+        buttons: Array.from(tr.querySelectorAll('button')).map(function(b) {
+            return {row: index, column: cells.indexOf(b.closest('td')), text: b.innerText.trim(), id: b.id, name: b.name, value: b.value, onclick: b.getAttribute('onclick')};
+        }),
+        links: Array.from(tr.querySelectorAll('a[href]')).map(function(a) { return a.href; })
+    };
+});
+"""
+CLICK_ROW_BUTTON_JS = """
+var table = document.getElementById(arguments[0]), rowIndex = arguments[1], text = arguments[2];
+if (!table) return false;
+function find(root) {
+    if (!root) return null;
+    return Array.from(root.querySelectorAll('button')).find(function(b) { return b.innerText.trim() === text; }) || null;
+}
+var button = find(table.querySelectorAll('tbody > tr')[rowIndex]) || find(table);
+if (!button) return false;
+button.scrollIntoView({block: 'center'});
+button.click();
+return true;
+"""
+CLICK_BACK_BUTTON_JS = """
+var button = Array.from(document.querySelectorAll('button')).find(function(b) { return b.offsetParent !== null && b.innerText.toLowerCase().indexOf('back') !== -1; });
+if (!button) return null;
+button.scrollIntoView({block: 'center'});
+button.click();
+return button;
+"""
+SET_LENGTH_JS = """
+var select = document.getElementsByName(arguments[0])[0], value = arguments[1];
+if (!select || !Array.from(select.options).some(function(o) { return o.value === value; })) return null;
+if (select.value === value) return false;
+select.value = value;
+select.dispatchEvent(new Event('change', {bubbles: true}));
+return true;
+"""
+TABLE_VIEW_JS = """
+var id = arguments[0], page = arguments[1], length = arguments[2];
+if (!window.jQuery || !jQuery.fn.dataTable || !jQuery.fn.dataTable.isDataTable('#' + id)) return null;
+var api = jQuery('#' + id).DataTable(), drew = false;
+if (length !== null && api.page.len() !== length) { api.page.len(length); drew = true; }
+if (page !== null && api.page.info().page !== page) { api.page(page); drew = true; }
+if (drew) api.draw('page');
+var info = api.page.info();
+info.drew = drew;
+info.rows = document.querySelectorAll('#' + id + ' tbody > tr').length;
+return info;
+"""
+PAGE_TIMING_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+if (!nav) return null;
+return {dom_ready_ms: nav.domContentLoadedEventEnd, load_ms: nav.loadEventEnd, transfer_bytes: nav.transferSize, resources: performance.getEntriesByType('resource').length};
+"""
+# Installed once per document (CDP on every new document, execute_script as a fallback): clicks OK/close buttons
+# of modals as soon as they are inserted or shown, so Python only has to read the dismissed counter
+POPUP_OBSERVER_JS = """
+(function() {
+    if (window.__khcPopups) return;
+    var state = window.__khcPopups = {dismissed: 0, last: null};
+    function isDismissButton(el) {
+        if (!(el.tagName === 'BUTTON' || (el.tagName === 'INPUT' && /^(button|submit)$/i.test(el.type)))) return false;
+        var label = (el.tagName === 'INPUT' ? el.value : el.textContent).trim().toLowerCase();
+        return label === 'ok' || (el.getAttribute('onclick') || '').indexOf('close') !== -1;
+    }
+    function scan(root) {
+        if (!root || root.nodeType !== 1) return;
+        var candidates = Array.from(root.querySelectorAll('button, input'));
+        candidates.unshift(root);
+        candidates.forEach(function(el) {
+            if (!isDismissButton(el) || el.offsetParent === null) return;
+            state.dismissed += 1;
+            state.last = (el.closest('.modal, .popup, [role=dialog]') || el.parentNode).textContent.trim().slice(0, 200);
+            el.click();
+        });
+    }
+    new MutationObserver(function(mutations) {
+        mutations.forEach(function(m) {
+            if (m.type === 'attributes') scan(m.target);
+            else m.addedNodes.forEach(scan);
+        });
+    }).observe(document, {childList: true, subtree: true, attributes: true, attributeFilter: ['style', 'class']});
+    if (document.body) scan(document.body);
+    else document.addEventListener('DOMContentLoaded', function() { scan(document.body); });
+})();
+"""
+POPUP_STATUS_JS = """
+var state = window.__khcPopups, status = [state.dismissed, state.last];
+state.dismissed = 0;
+return status;
+"""
+# True once the view a click should open is showing: any of the target tables, or (with no targets) a case's PDF page,
+# which has none of the list tables
+VIEW_READY_JS = """
+var targets = arguments[0], lists = ['example', 'example1', 'example3', 'example4'];
+function shown(id) { return document.getElementById(id) !== null; }
+return targets.length ? targets.some(shown) : !lists.some(shown);
+"""
+PDF_LINKS_JS = "return Array.from(document.querySelectorAll('table tr > td:nth-child(2) > a')).map(function(a) { return a.href; });"
+
+# Judgment headers: "WRIT PETITION NO.12345 OF 2020", "CRL.P NO. 101/2019", "DATED THIS THE 5TH DAY OF JANUARY, 2021"
+CASE_NUMBER_RE = re.compile(r"\b([A-Z][A-Z.()/-]*(?: [A-Z][A-Z.()/-]*){0,3}) ?N[Oo][Ss]?\. ?(\d+) ?(?:/|OF|of) ?(\d{4})")
+JUDGMENT_DATE_RE = re.compile(r"DATED (?:THIS )?THE (\d{1,2})(?:ST|ND|RD|TH)? DAY OF ([A-Z]+),? (\d{4})", re.I)
+# Bench lines only ("THE HON'BLE MR. JUSTICE S.R. KRISHNA KUMAR"), case-sensitive so prayer text like
+# "in the interest of justice and equity" never reads as a judge. A name is letter/initial words, stopping at digits,
+# at the next judge ("AND THE HON'BLE ...") and at a case number run into the same line ("WRIT PETITION NO.")
+NAME_STOP = r"(?!AND\b|HON|THE\b|NOS?\.|(?:WRIT|W\.?[PA]|CRIMINAL|CRL|CIVIL|C\.?R\.?P|REGULAR|R\.?[FS]\.?A|M\.?F\.?A|MISCELLANEOUS|COMMERCIAL|COMPANY|CONTEMPT|ORIGINAL|REVIEW|APPEAL|PETITION|CASE)\b)"
+JUSTICE_RE = re.compile(r"HON[\u2019']?BLE\s+(?:(?:MR|MRS|MS|DR|SMT|SRI|SHRI)\.?\s*)?(?:CHIEF\s+)?JUSTICE\s+([A-Z][A-Z.]*(?:\s+" + NAME_STOP + r"[A-Z][A-Z.]*)*)")
+
+class SQLiteStore:
+    # One autocommit WAL connection per thread, so crawler threads and other processes can write concurrently
+    SCHEMA = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.connections = []
+        self.connections_lock = threading.Lock()
+        self.connection().executescript(self.SCHEMA)
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            with self.connections_lock: self.connections.append(conn)
+        return conn
+
+    def close(self):
+        with self.connections_lock:
+            for conn in self.connections: conn.close()
+            self.connections = []
+        self.local = threading.local()
+
+class CrawlStateStore(SQLiteStore):
+    # Key/value crawl state: every write is its own small transaction,
+    # so per-case updates stay O(1) and a crash can never leave a half-written state file
+    SCHEMA = "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+
+    def __init__(self, path, metrics=None):
+        self.metrics = metrics
+        super().__init__(path)
+
+    def get(self, key, default=None):
+        row = self.connection().execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError: raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        start_time = time.perf_counter()
+        self.connection().execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        if self.metrics: self.metrics.observe("save_state", time.perf_counter() - start_time)
+
+    def __delitem__(self, key):
+        self.connection().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def __contains__(self, key):
+        return self.connection().execute("SELECT 1 FROM state WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection().execute("SELECT COUNT(*) FROM state").fetchone()[0]
+
+    def items(self, prefix=""):
+        rows = self.connection().execute("SELECT key, value FROM state WHERE key >= ? AND key < ? ORDER BY key", (prefix, prefix + "\uffff"))
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def update(self, mapping):
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", ((key, json.dumps(value)) for key, value in mapping.items()))
+
+    def clear(self):
+        self.connection().execute("DELETE FROM state")
+
+class CrawlManifest(SQLiteStore):
+    # Index of every case and PDF URL found during enumeration; the download phase drains it
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cases (case_key TEXT PRIMARY KEY, category TEXT NOT NULL, year TEXT NOT NULL, month TEXT, title TEXT NOT NULL, first_seen REAL NOT NULL, last_seen REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS pdfs (case_key TEXT NOT NULL, url TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', path TEXT, bytes INTEGER, sha256 TEXT, error TEXT, first_seen REAL NOT NULL, PRIMARY KEY (case_key, url));
+    CREATE INDEX IF NOT EXISTS pdfs_status ON pdfs (status);
+    """
+
+    def has_case(self, case_key):
+        return self.connection().execute("SELECT 1 FROM cases WHERE case_key = ?", (case_key,)).fetchone() is not None
+
+    def record_case(self, case_key, category, year, month, title, urls):
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("INSERT INTO cases (case_key, category, year, month, title, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (case_key) DO UPDATE SET last_seen = excluded.last_seen", (case_key, category, year, month, title, now, now))
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO pdfs (case_key, url, first_seen) VALUES (?, ?, ?)", ((case_key, url, now) for url in urls))
+            return conn.total_changes - before
+
+    def pending(self, limit=500):
+        return self.connection().execute("SELECT p.case_key, p.url, c.category, c.year, c.month FROM pdfs p JOIN cases c USING (case_key) WHERE p.status = 'pending' LIMIT ?", (limit,)).fetchall()
+
+    def mark_done(self, case_key, url, path, size, sha256):
+        self.connection().execute("UPDATE pdfs SET status = 'done', path = ?, bytes = ?, sha256 = ?, error = NULL WHERE case_key = ? AND url = ?", (path, size, sha256, case_key, url))
+
+    def mark_failed(self, case_key, url, error):
+        self.connection().execute("UPDATE pdfs SET status = 'failed', error = ? WHERE case_key = ? AND url = ?", (str(error), case_key, url))
+
+    def retry_failed(self):
+        return self.connection().execute("UPDATE pdfs SET status = 'pending' WHERE status = 'failed'").rowcount
+
+    def changes_since(self, since):
+        conn = self.connection()
+        new_cases = conn.execute("SELECT COUNT(*) FROM cases WHERE first_seen >= ?", (since,)).fetchone()[0]
+        new_pdfs = conn.execute("SELECT COUNT(*) FROM pdfs WHERE first_seen >= ?", (since,)).fetchone()[0]
+        return new_cases, new_pdfs
+
+    def summary(self):
+        conn = self.connection()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM pdfs GROUP BY status").fetchall())
+        counts['cases'] = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+        return counts
+
+class LeaseStore(SQLiteStore):
+    # Shared (category, year) work table: a unit is leased to one worker until its lease expires, so any number of
+    # processes pointed at the same file crawl disjoint units and pick up the ones an abandoned worker left behind
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS units (category TEXT NOT NULL, year TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_expires REAL,
+                                      attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL NOT NULL, PRIMARY KEY (category, year));
+    CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);
+    """
+
+    def filter_sql(self, categories=None, years=None):
+        sql, params = "", []
+        if categories: sql, params = sql + f" AND category IN ({','.join('?' * len(categories))})", params + list(categories)
+        if years: sql, params = sql + f" AND year IN ({','.join('?' * len(years))})", params + list(years)
+        return sql, params
+
+    def count(self, categories=None, years=None):
+        sql, params = self.filter_sql(categories, years)
+        return self.connection().execute("SELECT COUNT(*) FROM units WHERE 1 = 1" + sql, params).fetchone()[0]
+
+    def plan(self, units):
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO units (category, year, updated_at) VALUES (?, ?, ?)", ((category, year, now) for category, year in units))
+            return conn.total_changes - before
+
+    def acquire(self, worker, lease_seconds, categories=None, years=None):
+        # Takes a pending unit, or one whose lease ran out; returns (category, year, previous worker) or None
+        sql, params = self.filter_sql(categories, years)
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT category, year, status, worker FROM units WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))" + sql +
+                               " ORDER BY status DESC, attempts, rowid LIMIT 1", [now] + params).fetchone()
+            if row is None: return None
+            category, year, status, previous = row
+            conn.execute("UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE category = ? AND year = ?",
+                         (worker, now + lease_seconds, now, category, year))
+            return category, year, previous if status == 'leased' else None
+
+    def renew(self, worker, category, year, lease_seconds):
+        now = time.time()
+        return self.connection().execute("UPDATE units SET lease_expires = ?, updated_at = ? WHERE category = ? AND year = ? AND worker = ? AND status = 'leased'",
+                                         (now + lease_seconds, now, category, year, worker)).rowcount == 1
+
+    def complete(self, worker, category, year):
+        self.connection().execute("UPDATE units SET status = 'done', lease_expires = NULL, error = NULL, updated_at = ? WHERE category = ? AND year = ? AND worker = ?",
+                                  (time.time(), category, year, worker))
+
+    def fail(self, worker, category, year, error, max_attempts):
+        # Back to pending for another worker until the unit has used up its attempts
+        self.connection().execute("UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, lease_expires = NULL, error = ?, updated_at = ? "
+                                  "WHERE category = ? AND year = ? AND worker = ?", (max_attempts, str(error), time.time(), category, year, worker))
+
+    def release(self, worker):
+        return self.connection().execute("UPDATE units SET status = 'pending', lease_expires = NULL, attempts = MAX(attempts - 1, 0), updated_at = ? WHERE worker = ? AND status = 'leased'",
+                                         (time.time(), worker)).rowcount
+
+    def summary(self, categories=None, years=None):
+        sql, params = self.filter_sql(categories, years)
+        return dict(self.connection().execute("SELECT status, COUNT(*) FROM units WHERE 1 = 1" + sql + " GROUP BY status", params).fetchall())
+
+class ContentStore(SQLiteStore):
+    # Content-addressed PDF store: each distinct file is kept once under .objects/<sha256[:2]>/<sha256>.pdf and every
+    # category/year/month folder that lists it gets a hard link (a copy where links are unsupported) and an index row.
+    # The URL index lets the crawlers place a judgment they already have without downloading it again.
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS objects (sha256 TEXT PRIMARY KEY, bytes INTEGER NOT NULL, stored_at REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, sha256 TEXT NOT NULL, url TEXT, added_at REAL NOT NULL);
+    CREATE INDEX IF NOT EXISTS files_url ON files (url);
+    CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, '.objects')
+        super().__init__(os.path.join(root, 'content_index.db'))
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ".pdf")
+
+    def file_sha256(self, path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""): digest.update(chunk)
+        return digest.hexdigest()
+
+    def link(self, obj, dst):
+        # Hard link (a copy where links are unsupported); a different file already at dst is replaced,
+        # so the index never points at content that is not on disk
+        if os.path.exists(dst) and os.path.samefile(obj, dst): return
+        # Unique per process and thread: several shard workers may link into the same folder
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.link"
+        if os.path.exists(tmp): os.remove(tmp)
+        try: os.link(obj, tmp)
+        except OSError: shutil.copy2(obj, tmp)
+        os.replace(tmp, dst)
+
+    def add(self, src, dst, url=None, sha256=None):
+        # Moves src into the store (or drops it if the content is already there) and links it at dst
+        sha256 = sha256 or self.file_sha256(src)
+        obj = self.object_path(sha256)
+        is_new = not os.path.exists(obj)
+        if is_new:
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            size = os.path.getsize(src)
+            os.replace(src, obj)
+        else:
+            os.remove(src)
+        self.link(obj, dst)
+        # Both rows in one transaction: the indexer must never see an object without a path
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            if is_new: conn.execute("INSERT OR IGNORE INTO objects (sha256, bytes, stored_at) VALUES (?, ?, ?)", (sha256, size, time.time()))
+            conn.execute("INSERT OR REPLACE INTO files (path, sha256, url, added_at) VALUES (?, ?, ?, ?)", (os.path.relpath(dst, self.root), sha256, url, time.time()))
+        return sha256, is_new
+
+    def place(self, url, dst):
+        # Links an already stored copy of url at dst; None if the URL has never been stored
+        row = self.connection().execute("SELECT sha256 FROM files WHERE url = ? LIMIT 1", (url,)).fetchone()
+        if not row or not os.path.exists(self.object_path(row[0])): return None
+        self.link(self.object_path(row[0]), dst)
+        self.connection().execute("INSERT OR REPLACE INTO files (path, sha256, url, added_at) VALUES (?, ?, ?, ?)", (os.path.relpath(dst, self.root), row[0], url, time.time()))
+        return row[0]
+
+    def objects_after(self, rowid, limit):
+        # Stored objects in arrival order, with one of the paths they are linked at
+        return self.connection().execute("SELECT o.rowid, o.sha256, (SELECT path FROM files f WHERE f.sha256 = o.sha256 LIMIT 1) FROM objects o WHERE o.rowid > ? ORDER BY o.rowid LIMIT ?",
+                                         (rowid, limit)).fetchall()
+
+    def summary(self):
+        conn = self.connection()
+        objects, stored_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM objects").fetchone()
+        files, linked_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(o.bytes), 0) FROM files f JOIN objects o USING (sha256)").fetchone()
+        return {"files": files, "unique": objects, "stored_bytes": stored_bytes, "saved_bytes": linked_bytes - stored_bytes}
+
+def extract_judgment(path):
+    # Runs in the indexer's worker processes: full text plus case number, date and bench from the header
+    try:
+        pages = [page.extract_text() or "" for page in pypdf.PdfReader(path).pages]
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    text = "\n".join(pages)
+    header_lines = [line.strip() for line in text[:4000].splitlines() if line.strip()]
+    header = " ".join(" ".join(header_lines).split())
+    case = next((match for match in map(CASE_NUMBER_RE.search, header_lines) if match), None)
+    date = JUDGMENT_DATE_RE.search(header)
+    try: judgment_date = datetime.strptime(f"{date.group(1)} {date.group(2).title()} {date.group(3)}", "%d %B %Y").date().isoformat() if date else None
+    except ValueError: judgment_date = None
+    judges = []
+    for line in header_lines[:60]:
+        for match in JUSTICE_RE.finditer(line):
+            if match.group(1) not in judges: judges.append(match.group(1))
+    return {"text": text, "pages": len(pages), "case_number": f"{case.group(1)} {case.group(2)}/{case.group(3)}" if case else None,
+            "judgment_date": judgment_date, "bench": "; ".join(judges) or None}
+
+class JudgmentIndex(SQLiteStore):
+    # SQLite FTS5 index over judgment text and header metadata, one row per distinct PDF (by content hash)
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, sha256 TEXT UNIQUE NOT NULL, path TEXT, case_number TEXT, judgment_date TEXT, bench TEXT, pages INTEGER, error TEXT, indexed_at REAL NOT NULL);
+    CREATE INDEX IF NOT EXISTS documents_date ON documents (judgment_date);
+    CREATE VIRTUAL TABLE IF NOT EXISTS judgments USING fts5(case_number, bench, body, tokenize = 'porter unicode61');
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def watermark(self):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = 'content_rowid'").fetchone()
+        return int(row[0]) if row else 0
+
+    def add_batch(self, documents, watermark):
+        # documents: (sha256, path, extract_judgment result); the watermark moves in the same transaction
+        conn = self.connection()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN")
+            for sha256, path, doc in documents:
+                cursor = conn.execute("INSERT OR IGNORE INTO documents (sha256, path, case_number, judgment_date, bench, pages, error, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (sha256, path, doc.get("case_number"), doc.get("judgment_date"), doc.get("bench"), doc.get("pages"), doc.get("error"), now))
+                if cursor.rowcount and not doc.get("error"):
+                    conn.execute("INSERT INTO judgments (rowid, case_number, bench, body) VALUES (?, ?, ?, ?)", (cursor.lastrowid, doc["case_number"] or "", doc["bench"] or "", doc["text"]))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('content_rowid', ?)", (str(watermark),))
+
+    def search(self, query, limit=20, since=None, until=None):
+        # query is FTS5 syntax: words, "phrases", AND/OR/NOT, NEAR(), column filters such as bench:kumar.
+        # Text that is not valid FTS5 (crl.p, 12345/2020, foo-bar) is searched as a plain phrase instead.
+        sql = ("SELECT d.path, d.case_number, d.judgment_date, d.bench, snippet(judgments, 2, '[', ']', ' ... ', 16) "
+               "FROM judgments JOIN documents d ON d.id = judgments.rowid WHERE judgments MATCH ?")
+        params = []
+        if since: sql, params = sql + " AND d.judgment_date >= ?", params + [since]
+        if until: sql, params = sql + " AND d.judgment_date <= ?", params + [until]
+        sql, params = sql + " ORDER BY rank LIMIT ?", params + [limit]
+        try: rows = self.connection().execute(sql, [query] + params).fetchall()
+        except sqlite3.OperationalError:
+            rows = self.connection().execute(sql, ['"' + query.replace('"', '""') + '"'] + params).fetchall()
+        return [{"path": path, "case_number": case_number, "judgment_date": judgment_date, "bench": bench, "snippet": snippet} for path, case_number, judgment_date, bench, snippet in rows]
+
+    def summary(self):
+        conn = self.connection()
+        documents, failed = conn.execute("SELECT COUNT(*), COUNT(error) FROM documents").fetchone()
+        return {"documents": documents, "failed": failed}
+
+class JudgmentIndexer:
+    # Streams PDFs from the content store, in the order they were stored, through a process pool into the
+    # JudgmentIndex. Work goes in batches behind a watermark, so memory stays flat however many judgments there
+    # are, and a restarted indexer carries on from the last committed batch.
+    def __init__(self, download_dir, workers=None, batch_size=200, poll_interval=10, logger=None):
+        if pypdf is None:
+            raise RuntimeError("JudgmentIndexer needs pypdf (pip install pypdf)")
+        self.content_store = ContentStore(download_dir)
+        self.index = JudgmentIndex(os.path.join(download_dir, 'judgments_index.db'))
+        self.workers = workers or os.cpu_count() or 2
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def index_pending(self, pool):
+        indexed = 0
+        while True:
+            batch = self.content_store.objects_after(self.index.watermark(), self.batch_size)
+            if not batch: return indexed
+            start_time = time.time()
+            docs = pool.map(extract_judgment, [self.content_store.object_path(sha256) for _, sha256, _ in batch], chunksize=4)
+            self.index.add_batch([(sha256, path, doc) for (_, sha256, path), doc in zip(batch, docs)], batch[-1][0])
+            indexed += len(batch)
+            self.logger.info(f"Indexed {len(batch)} judgments in {time.time() - start_time:.2f} seconds ({indexed} this pass)")
+
+    def run(self, follow=False):
+        # follow keeps polling for newly stored PDFs until stop() is called, then indexes whatever is left
+        total = 0
+        # Never fork: this runs on a thread next to the browser, HTTP and SQLite threads, and a forked child can deadlock on their locks
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            while True:
+                total += self.index_pending(pool)
+                if not follow or self.stopping.is_set(): break
+                self.stopping.wait(self.poll_interval)
+        self.logger.info(f"Judgment index: {self.index.summary()}")
+        return total
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, kwargs={"follow": True}, name="indexer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread: self.thread.join()
+        self.content_store.close()
+        self.index.close()
+
+class CrawlMetrics:
+    # Per-operation counts and latency histograms, kept apart by kind: "work" (inclusive time of the operation),
+    # "wait" (DOM/readiness waits), "network" (HTTP requests) and "sleep" (deliberate pauses).
+    # Every observation is also appended to a JSON-lines event stream; totals are exported in Prometheus text format.
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+    def __init__(self, events_file=None, prometheus_file=None, prometheus_port=None, export_interval=30):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.events = open(events_file, 'a', encoding='utf-8') if events_file else None
+        self.prometheus_file = prometheus_file
+        self.export_interval = export_interval
+        self.last_export = time.time()
+        self.server = self.serve(prometheus_port) if prometheus_port else None
+
+    def observe(self, operation, seconds, kind="work", **fields):
+        with self.lock:
+            series = self.series.setdefault((operation, kind), {"count": 0, "sum": 0.0, "buckets": [0] * len(self.BUCKETS)})
+            series["count"] += 1
+            series["sum"] += seconds
+            for idx, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][idx] += 1
+                    break
+            if self.events:
+                self.events.write(json.dumps({"ts": round(time.time(), 3), "op": operation, "kind": kind, "seconds": round(seconds, 6), **fields}) + "\n")
+            export_due = self.prometheus_file and time.time() - self.last_export >= self.export_interval
+        if export_due: self.write_prometheus()
+
+    @contextmanager
+    def timer(self, operation, kind="work", **fields):
+        start_time = time.perf_counter()
+        try: yield
+        finally: self.observe(operation, time.perf_counter() - start_time, kind, **fields)
+
+    def sleep(self, seconds, operation="sleep"):
+        time.sleep(seconds)
+        self.observe(operation, seconds, "sleep")
+
+    def summary(self, kind=None):
+        with self.lock:
+            return {key: {"count": series["count"], "seconds": series["sum"]} for key, series in self.series.items() if kind is None or key[1] == kind}
+
+    def prometheus_text(self):
+        lines = ["# TYPE khc_operation_seconds histogram"]
+        with self.lock:
+            for (operation, kind), series in sorted(self.series.items()):
+                labels = f'operation="{operation}",kind="{kind}"'
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, series["buckets"]):
+                    cumulative += count
+                    lines.append(f'khc_operation_seconds_bucket{{{labels},le="{"+Inf" if bound == float("inf") else bound}"}} {cumulative}')
+                lines.append(f"khc_operation_seconds_sum{{{labels}}} {series['sum']:.6f}")
+                lines.append(f"khc_operation_seconds_count{{{labels}}} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        self.last_export = time.time()
+        tmp = self.prometheus_file + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.prometheus_file)
+
+    def serve(self, port):
+        metrics = self
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format, *args): pass
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def close(self):
+        with self.lock:
+            if self.events: self.events.flush()
+        if self.prometheus_file: self.write_prometheus()
+
+def timed(operation, kind="work"):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(operation, kind):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+class DownloadTracker:
+    # Maps each requested URL to the file Chrome saved for it. DevTools download events (Page.downloadWillBegin /
+    # Page.downloadProgress, read from the performance log) give the file name, state and bytes; without them
+    # the URL's own file name appearing in the download folder with no .crdownload partner marks completion.
+    def __init__(self, driver, download_dir):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.downloads = {}
+        self.guids = {}
+        self.started = {}
+        self.events_available = True
+
+    def poll_events(self):
+        if not self.events_available: return
+        try: entries = self.driver.get_log("performance")
+        except Exception:
+            self.events_available = False
+            return
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method in ("Page.downloadWillBegin", "Browser.downloadWillBegin") and params.get("url") in self.started:
+                self.guids[params["url"]] = params["guid"]
+                self.downloads[params["guid"]] = {"file": params.get("suggestedFilename"), "state": "inProgress", "bytes": 0}
+            elif method in ("Page.downloadProgress", "Browser.downloadProgress") and params.get("guid") in self.downloads:
+                download = self.downloads[params["guid"]]
+                download["state"], download["bytes"] = params["state"], params.get("receivedBytes", 0)
+
+    def start(self, url):
+        self.poll_events()
+        self.started[url] = time.perf_counter()
+
+    def status(self, url):
+        # Path of the finished file, False if the download was canceled, None while it is still running
+        self.poll_events()
+        download = self.downloads.get(self.guids.get(url))
+        if download and download["state"] == "canceled": return False
+        file_name = download["file"] if download and download["file"] else os.path.basename(unquote(urlparse(url).path))
+        path = os.path.join(self.download_dir, file_name)
+        if download and download["state"] != "completed": return None
+        if os.path.exists(path) and not os.path.exists(path + ".crdownload"): return path
+        return None
+
+    def finish(self, url):
+        path = self.status(url)
+        seconds = time.perf_counter() - self.started.pop(url, time.perf_counter())
+        download = self.downloads.pop(self.guids.pop(url, None), None)
+        if not path: return None
+        return {"url": url, "path": path, "bytes": download["bytes"] if download else os.path.getsize(path), "seconds": seconds}
+
+class HTTPStatusError(IOError):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class RequestGovernor:
+    # Per-host admission control shared by every navigation and download call. Concurrency and request rate start low,
+    # grow by one per success until the host first pushes back (slow start), then additively while calls succeed at
+    # normal latency, and halve on errors or latency spikes (AIMD), never above max_rate or max_concurrency (max_rate=None
+    # lifts the rate ceiling). Failed calls are retried with jittered exponential backoff, and a run of consecutive
+    # failures opens a circuit breaker that holds every call to the host until a single probe succeeds.
+    # adaptive=False keeps the retries, the breaker and the max_concurrency cap but does not pace calls.
+    def __init__(self, max_concurrency=8, max_rate=10.0, min_rate=0.2, start_rate=2.5, adaptive=True, retries=3, backoff_base=1.0, backoff_cap=60.0,
+                 latency_factor=3.0, failure_threshold=5, open_seconds=30.0, max_open_seconds=600.0, metrics=None, logger=None):
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.start_rate = start_rate if max_rate is None else min(start_rate, max_rate)
+        self.adaptive = adaptive
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.latency_factor = latency_factor
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.metrics = metrics
+        self.logger = logger or logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def host_state(self, host):
+        return self.hosts.setdefault(host, {"limit": min(2.0, self.max_concurrency), "rate": max(self.min_rate, self.start_rate), "in_flight": 0, "next_slot": 0.0,
+                                            "slow_start": True, "latency": None, "failures": 0, "trips": 0, "open_until": None, "probing": False, "last_decrease": 0.0})
+
+    def reserve(self, host):
+        # 0 when the call may start now, otherwise how long to wait before asking again
+        with self.lock:
+            state = self.host_state(host)
+            now = time.monotonic()
+            if state["open_until"] is not None:
+                if now < state["open_until"]: return state["open_until"] - now
+                if state["probing"] or state["in_flight"]: return 0.1
+            if state["in_flight"] >= (int(state["limit"]) if self.adaptive else self.max_concurrency): return 0.05
+            if self.adaptive:
+                if now < state["next_slot"]: return state["next_slot"] - now
+                state["next_slot"] = now + 1 / state["rate"]
+            state["in_flight"] += 1
+            if state["open_until"] is not None:
+                state["probing"] = True
+                self.logger.info(f"Circuit for {host} half-open, sending a probe request")
+            return 0
+
+    def release(self, host, seconds, ok):
+        with self.lock:
+            state = self.host_state(host)
+            now = time.monotonic()
+            state["in_flight"] -= 1
+            slow = state["latency"] is not None and seconds > self.latency_factor * state["latency"]
+            if ok: state["latency"] = seconds if state["latency"] is None else 0.8 * state["latency"] + 0.2 * seconds
+            if ok and not slow:
+                state["limit"] = min(self.max_concurrency, state["limit"] + (1 if state["slow_start"] else 1 / state["limit"]))
+                state["rate"] += 1 if state["slow_start"] else 1 / state["rate"]
+                if self.max_rate is not None: state["rate"] = min(self.max_rate, state["rate"])
+            elif now - state["last_decrease"] > max(1.0, state["latency"] or 0):
+                # One decrease per latency window, so a burst of failures from concurrent calls counts once
+                state["last_decrease"], state["slow_start"] = now, False
+                state["limit"] = max(1.0, state["limit"] / 2)
+                state["rate"] = max(self.min_rate, state["rate"] / 2)
+                self.logger.info(f"Throttling {host}: {'error' if not ok else f'slow response ({seconds:.2f}s)'}, now {int(state['limit'])} concurrent, {state['rate']:.2f} req/s")
+            if ok:
+                if state["open_until"] is not None: self.logger.info(f"Circuit for {host} closed")
+                state["failures"] = state["trips"] = 0
+                state["open_until"], state["probing"] = None, False
+                return
+            state["failures"] += 1
+            if state["probing"] or state["failures"] >= self.failure_threshold:
+                state["trips"] += 1
+                cooldown = min(self.max_open_seconds, self.open_seconds * 2 ** (state["trips"] - 1))
+                state["open_until"], state["probing"] = now + cooldown, False
+                self.logger.warning(f"Circuit for {host} open for {cooldown:.0f}s after {state['failures']} consecutive failures")
+
+    def backoff_delay(self, attempt):
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def retryable(self, error):
+        status = getattr(error, "status", None)
+        return not (status and 400 <= status < 500 and status not in (408, 429))
+
+    def record_wait(self, seconds, operation):
+        if self.metrics and seconds: self.metrics.observe(operation, seconds, "sleep")
+
+    def acquire(self, host):
+        waited = 0.0
+        delay = self.reserve(host)
+        while delay:
+            time.sleep(delay)
+            waited += delay
+            delay = self.reserve(host)
+        self.record_wait(waited, "throttle")
+
+    async def acquire_async(self, host):
+        waited = 0.0
+        delay = self.reserve(host)
+        while delay:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self.reserve(host)
+        self.record_wait(waited, "throttle")
+
+    def call(self, host, func, *args, ok=None, retries=None, **kwargs):
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.acquire(host)
+            start_time, error, result = time.perf_counter(), None, None
+            try:
+                result = func(*args, **kwargs)
+                succeeded = ok(result) if ok else True
+            except Exception as e:
+                error, succeeded = e, not self.retryable(e)
+            self.release(host, time.perf_counter() - start_time, succeeded)
+            if error is None and succeeded: return result
+            if attempt == retries or (error is not None and not self.retryable(error)):
+                if error is not None: raise error
+                return result
+            delay = self.backoff_delay(attempt)
+            self.logger.info(f"Retrying {func.__name__} on {host} in {delay:.1f}s (attempt {attempt + 2}/{retries + 1}): {error or result}")
+            time.sleep(delay)
+            self.record_wait(delay, "backoff")
+
+    async def call_async(self, host, func, *args, ok=None, retries=None, **kwargs):
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            await self.acquire_async(host)
+            start_time, error, result = time.perf_counter(), None, None
+            try:
+                result = await func(*args, **kwargs)
+                succeeded = ok(result) if ok else True
+            except Exception as e:
+                error, succeeded = e, not self.retryable(e)
+            self.release(host, time.perf_counter() - start_time, succeeded)
+            if error is None and succeeded: return result
+            if attempt == retries or (error is not None and not self.retryable(error)):
+                if error is not None: raise error
+                return result
+            delay = self.backoff_delay(attempt)
+            self.logger.info(f"Retrying {func.__name__} on {host} in {delay:.1f}s (attempt {attempt + 2}/{retries + 1}): {error or result}")
+            await asyncio.sleep(delay)
+            self.record_wait(delay, "backoff")
+
+    def summary(self):
+        with self.lock:
+            return {host: {"concurrency": int(state["limit"]), "rate": round(state["rate"], 2), "latency": round(state["latency"] or 0, 3), "circuit": "open" if state["open_until"] else "closed"}
+                    for host, state in self.hosts.items()}
+
+def governed(retry=True, ok=None, by_url=False):
+    # Routes a crawler method through self.governor; by_url takes the host from the first argument instead of the site
+    def decorator(method):
+        def host(self, args):
+            return (urlparse(args[0]).netloc if by_url and args else "") or self.host
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                return await self.governor.call_async(host(self, args), method, self, *args, ok=ok, retries=None if retry else 0, **kwargs)
+            return async_wrapper
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.governor.call(host(self, args), method, self, *args, ok=ok, retries=None if retry else 0, **kwargs)
+        return wrapper
+    return decorator
+
+def process_tree_rss(pid):
+    # Resident memory of a process and all of its descendants (chromedriver -> Chrome -> renderers), None if unknown
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            total = 0
+            for process in [root] + root.children(recursive=True):
+                try: total += process.memory_info().rss
+                except psutil.Error: continue
+            return total
+        except psutil.Error: return None
+    if not os.path.isdir("/proc"): return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit(): continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                children.setdefault(int(f.read().rsplit(")", 1)[1].split()[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError): continue
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError): continue
+    return total
+
+class BrowserLostError(RuntimeError):
+    # The browser had to be restarted and could not be brought back to the crawl position; the unit is abandoned
+    pass
+
+class DriverSupervisor:
+    # Checks the browser at safe points (the top of every year, month and case iteration). When Chrome stops answering,
+    # outgrows its memory limit or reaches its maximum age, it starts a fresh browser and replays the navigation to the
+    # last recorded category/year/month/page, so the crawl carries on where it was instead of walking the site again.
+    def __init__(self, downloader, max_rss_mb=1500, max_age_seconds=None, rss_interval=30, max_restarts=50):
+        self.downloader = downloader
+        self.max_rss_mb = max_rss_mb
+        self.max_age_seconds = max_age_seconds
+        self.rss_interval = rss_interval
+        self.max_restarts = max_restarts
+        self.position = {"category": None, "year": None, "month": None, "page": 0}
+        self.started = time.monotonic()
+        self.last_rss_check = time.monotonic()
+        self.restarts = 0
+
+    def healthy(self):
+        try:
+            self.downloader.driver.execute_script("return 1;")
+            return True
+        except WebDriverException:
+            return False
+
+    def browser_rss(self):
+        try: pid = self.downloader.driver.service.process.pid
+        except AttributeError: return None
+        return process_tree_rss(pid)
+
+    def restart_reason(self):
+        if not self.healthy(): return "browser is not responding"
+        now = time.monotonic()
+        if self.max_age_seconds and now - self.started > self.max_age_seconds:
+            return f"browser has been running for {(now - self.started) / 3600:.1f} hours"
+        if self.max_rss_mb and now - self.last_rss_check >= self.rss_interval:
+            self.last_rss_check = now
+            rss = self.browser_rss()
+            if rss:
+                self.downloader.logger.debug(f"Browser RSS: {rss / 2 ** 20:.0f} MB")
+                if rss > self.max_rss_mb * 2 ** 20: return f"browser RSS {rss / 2 ** 20:.0f} MB is over {self.max_rss_mb} MB"
+        return None
+
+    def checkpoint(self, category=None, year=None, month=None, page=0):
+        self.position = {"category": category, "year": year, "month": month, "page": page}
+        reason = self.restart_reason()
+        if not reason: return False
+        if not self.restart(reason): raise BrowserLostError(f"Browser restart failed ({reason}); could not return to {self.position}")
+        return True
+
+    def recover(self):
+        # After an error: restart only if the browser itself is gone
+        return False if self.healthy() else self.restart("browser crashed")
+
+    def restart(self, reason):
+        if self.restarts >= self.max_restarts:
+            self.downloader.logger.error(f"Not restarting the browser ({reason}): already restarted {self.restarts} times")
+            return False
+        self.restarts += 1
+        position = self.position
+        self.downloader.logger.warning(f"Restarting browser ({reason}), then returning to {position}")
+        start_time = time.perf_counter()
+        self.downloader.restart_driver()
+        self.started = self.last_rss_check = time.monotonic()
+        restored = self.downloader.restore_position(position)
+        self.downloader.metrics.observe("driver_restart", time.perf_counter() - start_time, restored=restored)
+        if not restored: self.downloader.logger.error(f"Could not return to {position} after the restart")
+        return restored
+
+class CrawlerBase:
+    # State, folder layout and tree-node helpers shared by the Selenium and HTTP crawlers
+    def setup_logging(self):
+        log_file = os.path.join(self.download_dir, 'download_log.txt')
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',handlers=[logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()])
+        self.logger = logging.getLogger(__name__)
+
+    def create_metrics(self, metrics, metrics_port):
+        if metrics is not None: return metrics
+        return CrawlMetrics(os.path.join(self.download_dir, 'metrics.jsonl'), os.path.join(self.download_dir, 'metrics.prom'), metrics_port)
+
+    def start_indexer(self, workers):
+        # Text extraction and indexing run beside the crawl and pick up PDFs as soon as they are stored
+        if not workers: return None
+        return JudgmentIndexer(self.download_dir, workers, logger=self.logger).start()
+
+    def log_metrics(self):
+        for (operation, kind), stats in sorted(self.metrics.summary().items(), key=lambda item: -item[1]["seconds"]):
+            self.logger.info(f"{kind.capitalize()} '{operation}': {stats['count']} calls, {stats['seconds']:.2f} seconds")
+
+    def load_state(self):
+        store = CrawlStateStore(self.state_file, metrics=self.metrics)
+        if not self.resume and not self.incremental:
+            store.clear()
+        elif os.path.exists(self.legacy_state_file):
+            try:
+                with open(self.legacy_state_file, 'r') as f:
+                    store.update(json.load(f))
+                os.replace(self.legacy_state_file, self.legacy_state_file + ".migrated")
+                self.logger.info(f"Migrated legacy state file into {self.state_file}")
+            except Exception as e:
+                os.replace(self.legacy_state_file, self.legacy_state_file + ".corrupt")
+                self.logger.error(f"Could not migrate legacy state file, kept it as {self.legacy_state_file}.corrupt: {e}")
+        self.logger.info(f"Loaded {len(store)} state entries")
+        return store
+
+    def create_category_folder(self, category_name):
+        safe_category_name = "".join(c for c in category_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        category_folder = os.path.join(self.download_dir, safe_category_name)
+        if not os.path.exists(category_folder):  os.makedirs(category_folder)
+        return category_folder
+
+    def create_year_folder(self, category_folder, year):
+        year_folder = os.path.join(category_folder, str(year))
+        if not os.path.exists(year_folder): os.makedirs(year_folder)
+        return year_folder
+
+    def create_month_folder(self, year_folder, month):
+        month_folder = os.path.join(year_folder, str(month))
+        if not os.path.exists(month_folder):os.makedirs(month_folder)
+        return month_folder
+
+    def final_folder(self, category_name, year, month=None):
+        year_folder = self.create_year_folder(self.create_category_folder(category_name), year)
+        return self.create_month_folder(year_folder, month) if month else year_folder
+
+    def year_label(self, year_btn, year_idx):
+        return self.node_label(year_btn) or f"Year_{year_idx + 1}"
+
+    def node_label(self, btn):
+        return btn['text'].split('[')[0].strip()
+
+    def node_count(self, btn):
+        # Year and month buttons read like "2021 [134]"; the bracketed number is the case count
+        match = re.search(r"\[\s*(\d+)\s*\]", btn['text'])
+        return int(match.group(1)) if match else None
+
+    def node_changed(self, count_key, count):
+        if not self.incremental or count is None:
+            return True
+        previous = self.current_state.get(count_key)
+        return previous is None or count > previous
+
+    def is_completed(self, key):
+        # Completion flags are per-run progress; incremental runs rely on the stored counts instead
+        return self.resume and not self.incremental and bool(self.current_state.get(key))
+
+class KHCJudgmentDownloader(CrawlerBase):
+    WAIT_TIMEOUTS = {"page": 20, "ajax": 10, "draw": 10, "stale": 5, "popup": 3, "window": 5, "download": 60, "view": 10}
+    # The tables a row click in each table opens; a click in example4 opens the case's PDF page in its place
+    CHILD_TABLES = {"example": ["example1"], "example1": ["example3", "example4"], "example3": ["example4"]}
+    # Everything the crawler never looks at: images, fonts, media and third-party trackers
+    BLOCKED_URL_PATTERNS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp", "*.bmp", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.mp4", "*.mp3", "*.webm",
+                            "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*", "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*translate.google*"]
+
+    def __init__(self, download_dir=None, resume=False, download_mode="browser", download_workers=4, wait_timeouts=None, staging_dir=None, state=None, phase="crawl", incremental=False,
+                 headless=False, block_resources=False, blocked_hosts=(), page_load_strategy="normal", user_data_dir=None,
+                 show_all_rows=True, table_page_length=50, base_url=BASE_URL, metrics=None, metrics_port=None, governor=None,
+                 max_browser_rss_mb=1500, max_browser_age=None, index_workers=0):
         if download_dir is None:
             download_dir = os.path.join(os.getcwd(), 'KHC_Judgments')
         if not os.path.exists(download_dir): os.makedirs(download_dir)
         self.download_dir = download_dir
-        self.state_file = os.path.join(download_dir, 'download_state.json')
+        self.base_url = base_url
+        # Chrome drops files here before they are moved into the category tree; workers each get their own
+        self.staging_dir = staging_dir or download_dir
+        if not os.path.exists(self.staging_dir): os.makedirs(self.staging_dir)
+        self.phase = phase
+        # Enumeration keeps its own progress so it never marks cases as downloaded
+        self.state_file = os.path.join(download_dir, 'enumerate_state.db' if phase == "enumerate" else 'download_state.db')
+        self.legacy_state_file = os.path.join(download_dir, 'download_state.json')
         self.resume = resume
-        self.current_state = self.load_state() if resume else {}
+        # Incremental sync keeps state between runs and only descends into nodes whose site count went up
+        self.incremental = incremental
+        self.download_mode = download_mode
+        self.download_workers = download_workers
+        # Retries and backoff are the governor's job; urllib3 only follows redirects
+        self.http = urllib3.PoolManager(maxsize=download_workers, block=True, retries=urllib3.Retry(total=None, connect=0, read=0, other=0, redirect=3), timeout=urllib3.Timeout(connect=10, read=60))
+        self.download_pool = ThreadPoolExecutor(max_workers=download_workers) if download_mode == "http" else None
+        self.pending_downloads = []
+        # Cases that did not finish this run; a node only records its count once none failed beneath it
+        self.failed_cases = 0
+        self.wait_timeouts = {**self.WAIT_TIMEOUTS, **(wait_timeouts or {})}
+        self.page_load_times = []
+        self.popups_dismissed = 0
+        self.index_workers = index_workers
+        self.indexer = None
+        self.show_all_rows = show_all_rows
+        self.table_page_length = table_page_length
+        self.show_all_rejected = set()
+        self.headless = headless
+        self.block_resources = block_resources
+        self.blocked_url_patterns = self.BLOCKED_URL_PATTERNS + [f"*{host}*" for host in blocked_hosts]
+        self.page_load_strategy = page_load_strategy
+        # With eager/none loading the DOM is usable before images, fonts and CSS finish, so don't wait for the load event
+        self.ready_states = ["complete"] if page_load_strategy == "normal" else ["interactive", "complete"]
+        self.user_data_dir = user_data_dir
         self.setup_logging()
+        self.metrics = self.create_metrics(metrics, metrics_port)
+        self.governor = governor or RequestGovernor(metrics=self.metrics, logger=self.logger)
+        self.host = urlparse(base_url).netloc
+        # The download phase works from the manifest alone; it must not load, or clear, a crawl's resume state
+        if state is None: state = {} if phase == "download" else self.load_state()
+        self.current_state = state
+        self.manifest = CrawlManifest(os.path.join(download_dir, 'manifest.db')) if phase != "crawl" else None
+        self.content_store = ContentStore(download_dir)
+        self.driver = self.build_driver()
+        self.download_tracker = DownloadTracker(self.driver, self.staging_dir)
+        self.supervisor = DriverSupervisor(self, max_rss_mb=max_browser_rss_mb, max_age_seconds=max_browser_age)
+        self.logger.info(f"Download Directory: {self.download_dir}")
+        self.logger.info(f"Resume mode: {resume}")
+        self.logger.info(f"Download mode: {download_mode}")
+        self.logger.info(f"Phase: {phase}")
+        self.logger.info(f"Incremental mode: {incremental}")
+        self.logger.info(f"Browser profile: {self.profile_name()}")
+
+    def profile_name(self):
+        return f"headless={self.headless} block_resources={self.block_resources} page_load={self.page_load_strategy} warm_profile={bool(self.user_data_dir)}"
+
+    def build_driver(self):
+        start_time = time.time()
         chrome_options = Options()
         chrome_options.add_argument("--disable-extensions")
         chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-images")
-        prefs = {"download.default_directory": download_dir, "download.prompt_for_download": False, "plugins.always_open_pdf_externally": True,"profile.default_content_setting_values.notifications": 2,"download.directory_upgrade": True}
+        chrome_options.page_load_strategy = self.page_load_strategy
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+            chrome_options.add_argument("--window-size=1920,1080")
+            chrome_options.add_argument("--disable-gpu")
+        if self.user_data_dir:
+            # A warm profile keeps the HTTP cache and cookies between runs
+            chrome_options.add_argument(f"--user-data-dir={self.user_data_dir}")
+        prefs = {"download.default_directory": self.staging_dir, "download.prompt_for_download": False, "plugins.always_open_pdf_externally": True,"profile.default_content_setting_values.notifications": 2,"download.directory_upgrade": True}
+        if self.block_resources:
+            prefs["profile.managed_default_content_settings.images"] = 2
         chrome_options.add_experimental_option("prefs", prefs)
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 10)
-        self.logger.info(f"Download Directory: {self.download_dir}")
-        self.logger.info(f"Resume mode: {resume}")
-        
-    def setup_logging(self):
-        log_file = os.path.join(self.download_dir, 'download_log.txt')
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',handlers=[logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()])
-        self.logger = logging.getLogger(__name__)
-        
-    def load_state(self):
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    return json.load(f)
-            except:return {}
-        return {}
-    
-    def save_state(self):
+        # Page-domain events only: the download tracker reads Page.download* from the performance log
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": False, "enablePage": True})
+        driver = webdriver.Chrome(options=chrome_options)
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": POPUP_OBSERVER_JS})
+        if self.block_resources:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_url_patterns})
+        if self.headless:
+            driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": self.staging_dir})
+        self.logger.info(f"Browser started in {time.time() - start_time:.2f} seconds")
+        return driver
+
+    def restart_driver(self):
+        try: self.driver.quit()
+        except Exception: pass
+        self.driver = self.build_driver()
+        self.download_tracker = DownloadTracker(self.driver, self.staging_dir)
+
+    def restore_position(self, position):
+        if not self.navigate_to_website(): return False
+        if not position["category"]: return True
+        if not self.select_category(position["category"]): return False
+        if not position["year"]: return True
+        year_row = self.find_row("example1", position["year"], self.year_label)
+        if not year_row or not self.click_row_button("example1", year_row[0]['row'], year_row[0]['text']): return False
+        if position["month"]:
+            month_row = self.find_row("example3", position["month"], lambda btn, idx: self.node_label(btn))
+            if not month_row or not self.click_row_button("example3", month_row[0]['row'], month_row[0]['text']): return False
+        if position["page"]: self.show_table_page("example4", position["page"])
+        return True
+
+    def wait_for(self, condition, label, timeout=None):
+        start_time = time.perf_counter()
+        completed = True
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(self.current_state, f, indent=2)
-        except Exception as e:
-            self.logger.error(f"Error saving state: {e}")
+            WebDriverWait(self.driver, timeout if timeout is not None else self.wait_timeouts[label], poll_frequency=0.05).until(condition)
+        except TimeoutException:
+            completed = False
+            self.logger.debug(f"Timed out waiting for {label}")
+        self.metrics.observe(f"wait_{label}", time.perf_counter() - start_time, "wait", timed_out=not completed)
+        return completed
+
+    def wait_for_page(self):
+        return self.wait_for(lambda d: d.execute_script(AJAX_IDLE_JS, self.ready_states) and d.find_elements(By.ID, "example"), "page")
+
+    def wait_for_ajax(self):
+        return self.wait_for(lambda d: d.execute_script(AJAX_IDLE_JS, self.ready_states), "ajax")
+
+    def get_draw_count(self, table_id):
+        try: return self.driver.execute_script(DRAW_COUNT_JS, table_id)
+        except: return -1
+
+    def wait_for_table_draw(self, table_id, previous_draws):
+        if previous_draws < 0:
+            return self.wait_for_ajax()
+        return self.wait_for(lambda d: d.execute_script(DRAW_COUNT_JS, table_id) > previous_draws, "draw")
+
+    def wait_for_stale(self, element):
+        return self.wait_for(EC.any_of(EC.staleness_of(element), EC.invisibility_of_element(element)), "stale")
+
+    def view_ready(self, targets):
+        return self.driver.execute_script(VIEW_READY_JS, targets)
+
+    def wait_for_view(self, targets):
+        return self.wait_for(lambda d: d.execute_script(VIEW_READY_JS, targets), "view")
 
+    def wait_for_popup_gone(self, button):
+        return self.wait_for(EC.any_of(EC.staleness_of(button), EC.invisibility_of_element(button)), "popup")
+
+    @timed("handle_popup")
     def handle_popup(self):
         try:
-            time.sleep(1)
+            self.wait_for_ajax()
+            # The observer is already in the page for normal loads; installing it here is a no-op unless the CDP hook missed this document
+            dismissed, text = self.driver.execute_script(POPUP_OBSERVER_JS + POPUP_STATUS_JS)
+            if not dismissed: return False
+            self.popups_dismissed += dismissed
+            self.logger.info(f"Dismissed {dismissed} popup(s): {text}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Popup observer unavailable, scanning for popups: {e}")
+            return self.scan_for_popup()
+
+    def scan_for_popup(self):
+        try:
             popup_selectors = [
                 "//button[contains(text(), 'OK')]","//button[contains(text(), 'Ok')]","//button[contains(text(), 'ok')]","//input[@value='OK']","//input[@value='Ok']","//input[@value='ok']",
                 "//button[contains(@onclick, 'close')]","//div[@class='modal']//button[contains(text(), 'OK')]","//div[contains(@class, 'popup')]//button[contains(text(), 'OK')]"]
@@ -62,7 +1201,7 @@ class KHCJudgmentDownloader:
                             self.logger.info("Found popup, clicking OK button...")
                             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
                             self.driver.execute_script("arguments[0].click();", button)
-                            time.sleep(1)  # Wait for popup to close completely
+                            self.wait_for_popup_gone(button)
                             self.logger.info("Popup handled successfully")
                             return True
                 except:continue
@@ -71,35 +1210,49 @@ class KHCJudgmentDownloader:
             self.logger.warning(f"Error handling popup: {e}")
             return False
         
+    @governed(retry=False)
+    @timed("safe_click")
     def safe_click(self, element):
         try:
             self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
             self.driver.execute_script("arguments[0].click();", element)
-            time.sleep(0.5)
             self.handle_popup()
             return True
         except Exception as e:
             self.logger.error(f"Error in safe_click: {e}")
             return False
     
+    @governed(ok=bool)
+    @timed("navigate_to_website")
     def navigate_to_website(self):
-        self.logger.info("Navigating to Karnataka Judiciary website...")
-        self.driver.get("https://judiciary.karnataka.gov.in/ds_judgment.php")
-        time.sleep(2)
-        self.handle_popup() 
+        self.logger.info(f"Navigating to Karnataka Judiciary website: {self.base_url}")
+        start_time = time.time()
+        self.driver.get(self.base_url)
+        if not self.wait_for_page():
+            self.logger.warning("Page did not finish loading")
+            return False
+        self.record_page_load(time.time() - start_time)
+        self.handle_popup()
         self.logger.info("Page loaded successfully")
+        return True
+
+    def record_page_load(self, seconds):
+        try: timing = self.driver.execute_script(PAGE_TIMING_JS) or {}
+        except: timing = {}
+        self.page_load_times.append(seconds)
+        self.logger.info(f"Page load: {seconds:.2f}s until ready, DOMContentLoaded {timing.get('dom_ready_ms', 0):.0f} ms, load {timing.get('load_ms', 0):.0f} ms, {timing.get('resources', 0)} resources, {timing.get('transfer_bytes', 0)} bytes")
+
+    def log_page_load_stats(self):
+        if not self.page_load_times: return
+        times = sorted(self.page_load_times)
+        self.logger.info(f"Page loads ({self.profile_name()}): {len(times)} loads, mean {sum(times) / len(times):.2f}s, median {times[len(times) // 2]:.2f}s, max {times[-1]:.2f}s")
     
     def get_all_categories(self):
         self.logger.info("Fetching all available categories...")
         categories = []
         try:
-            self.set_display_length("example_length", "100")
-            time.sleep(1)
-            buttons = self.driver.find_elements(By.XPATH, '//*[@id="example"]/tbody/tr/td/button')
-            for btn in buttons:
-                category_name = btn.text.strip()
-                if category_name:
-                    categories.append(category_name)
+            self.show_table_page("example")
+            categories = [btn['text'] for btn in self.table_buttons("example") if btn['text']]
             self.logger.info(f"Found {len(categories)} categories: {categories}")
         except Exception as e:
             self.logger.error(f"Error fetching categories: {e}")
@@ -108,171 +1261,322 @@ class KHCJudgmentDownloader:
     def select_category(self, category_name):
         self.logger.info(f"Selecting category: {category_name}")
         try:
-            self.set_display_length("example_length", "100")
-            time.sleep(1)
-            buttons = self.driver.find_elements(By.XPATH, '//*[@id="example"]/tbody/tr/td/button')
-            for btn in buttons:
-                btn_text = btn.text.strip()
-                if category_name == btn_text:
-                    self.logger.info(f"Found and selecting category: {btn_text}")
-                    self.safe_click(btn)
-                    return True
+            self.show_table_page("example")
+            for btn in self.table_buttons("example"):
+                if category_name == btn['text']:
+                    self.logger.info(f"Found and selecting category: {btn['text']}")
+                    return self.click_row_button("example", btn['row'], btn['text'])
             self.logger.error(f"Category '{category_name}' not found")
             return False
         except Exception as e:
             self.logger.error(f"Error selecting category: {e}")
             return False
     
+    @timed("set_display_length")
     def set_display_length(self, table_name, value="100"):
         try:
-            Select(self.driver.find_element(By.NAME, table_name)).select_by_value(value)
-            time.sleep(0.3) 
+            previous_draws = self.get_draw_count(table_name[:-len("_length")])
+            changed = self.driver.execute_script(SET_LENGTH_JS, table_name, value)
+            if changed is None: return False
+            if changed: self.wait_for_table_draw(table_name[:-len("_length")], previous_draws)
             return True
         except: return False
     
-    def click_back_button(self):
-        try:
-            buttons = self.driver.find_elements(By.TAG_NAME, "button")
-            for btn in buttons:
-                if "back" in btn.text.lower():
-                    self.safe_click(btn)
-                    return True
-        except: pass
-        return False
-    
-    def handle_pagination(self, table_id):
+    def snapshot_table(self, table_id):
+        # One round-trip for the whole table instead of a find_element/.text per row
+        try: return self.driver.execute_script(TABLE_SNAPSHOT_JS, table_id) or []
+        except Exception as e:
+            self.logger.warning(f"Error reading table {table_id}: {e}")
+            return []
+
+    def table_buttons(self, table_id, column=None):
+        return [btn for row in self.snapshot_table(table_id) for btn in row['buttons'] if column is None or btn['column'] == column]
+
+    @governed(ok=lambda result: result is not False)
+    @timed("click_row_button")
+    def click_row_button(self, table_id, row_index, button_text):
+        # A failed form post leaves the table in place behind a (dismissed) error popup, so only the new view counts as success.
+        # False (the site did not answer) is retried; None (nothing to click on this page) is not, and is not held against the host
+        targets = self.CHILD_TABLES.get(table_id, [])
         try:
-            pagination_div = self.driver.find_element(By.ID, f"{table_id}_paginate")
-            pages = pagination_div.find_elements(By.CSS_SELECTOR, "li.paginate_button.page-item:not(.previous):not(.next):not(.disabled)")
-            if len(pages) <= 1:
+            # A retry after a click whose view was slow to appear must not click again from the child page
+            if not self.driver.find_elements(By.ID, table_id) and self.view_ready(targets): return True
+            if not self.driver.execute_script(CLICK_ROW_BUTTON_JS, table_id, row_index, button_text):
+                self.logger.error(f"Button '{button_text}' not found in table {table_id}")
+                return None
+            self.handle_popup()
+            if not self.wait_for_view(targets):
+                self.logger.warning(f"Clicking '{button_text}' in table {table_id} did not open the next page")
                 return False
-            for page_num in range(2, len(pages) + 1):
-                try:
-                    page_btn = pagination_div.find_element(By.CSS_SELECTOR, f"li.paginate_button.page-item a[data-dt-idx='{page_num}']")
-                    self.safe_click(page_btn)
-                    return True
-                except: continue
-        except:return False
-        return False
-    
-    def create_category_folder(self, category_name):
-        safe_category_name = "".join(c for c in category_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        category_folder = os.path.join(self.download_dir, safe_category_name)
-        if not os.path.exists(category_folder):  os.makedirs(category_folder)
-        return category_folder
-    
-    def create_year_folder(self, category_folder, year):
-        year_folder = os.path.join(category_folder, str(year))
-        if not os.path.exists(year_folder): os.makedirs(year_folder)
-        return year_folder
-    
-    def create_month_folder(self, year_folder, month):
-        month_folder = os.path.join(year_folder, str(month))
-        if not os.path.exists(month_folder):os.makedirs(month_folder)
-        return month_folder
+            return True
+        except Exception as e:
+            self.logger.error(f"Error clicking '{button_text}' in table {table_id}: {e}")
+            return False
+
+    def collect_pdf_links(self):
+        return [href for href in self.driver.execute_script(PDF_LINKS_JS) if href and href.endswith('.pdf')]
+
+    @governed(ok=lambda result: result is not False)
+    @timed("click_back_button")
+    def click_back_button(self, parent=None):
+        # parent is the table the back button should return to; a retry after a slow success must not climb another level
+        try:
+            if parent and self.driver.find_elements(By.ID, parent): return True
+            btn = self.driver.execute_script(CLICK_BACK_BUTTON_JS)
+            if btn is None: return None
+            self.handle_popup()
+            if parent: return self.wait_for_view([parent])
+            self.wait_for_stale(btn)
+            return True
+        except: return False
     
-    def get_current_pdf_count(self):
-        pdf_files = glob.glob(os.path.join(self.download_dir, "*.pdf"))
-        return len(pdf_files)
+    def show_table_page(self, table_id, page=0):
+        # Drives the page's DataTables instance directly: one script call, and at most one draw
+        length = -1 if self.show_all_rows and table_id not in self.show_all_rejected else self.table_page_length
+        try:
+            previous_draws = self.get_draw_count(table_id)
+            info = self.driver.execute_script(TABLE_VIEW_JS, table_id, page, length)
+        except Exception as e:
+            self.logger.warning(f"DataTables API unavailable for {table_id}: {e}")
+            info = None
+        if info is None:
+            self.set_display_length(f"{table_id}_length", str(self.table_page_length))
+            return None
+        if info['drew']:
+            self.wait_for_table_draw(table_id, previous_draws)
+            info = self.driver.execute_script(TABLE_VIEW_JS, table_id, None, None)
+        if length == -1 and info['rows'] < info['recordsDisplay']:
+            self.logger.info(f"Server ignored show-all for {table_id}; paging {self.table_page_length} rows at a time")
+            self.show_all_rejected.add(table_id)
+            return self.show_table_page(table_id, page)
+        return info
+
+    def handle_pagination(self, table_id, page_num=1):
+        # page_num is the 1-based page just processed; moves to the following page if there is one
+        info = self.show_table_page(table_id, page_num - 1)
+        if info is not None:
+            if page_num >= info['pages']: return False
+            return self.show_table_page(table_id, page_num) is not None
+        return self.click_next_page(table_id)
+
+    def click_next_page(self, table_id):
+        # Fallback for tables that are not DataTables instances
+        try:
+            next_btn = self.driver.find_element(By.CSS_SELECTOR, f"#{table_id}_paginate li.paginate_button.next:not(.disabled) a")
+            previous_draws = self.get_draw_count(table_id)
+            self.safe_click(next_btn)
+            self.wait_for_table_draw(table_id, previous_draws)
+            return True
+        except: return False
     
+    @timed("move_files_to_final_location")
     def move_files_to_final_location(self, category_name, year, month=None):
-        category_folder = self.create_category_folder(category_name)
-        year_folder = self.create_year_folder(category_folder, year)
-        if month:final_folder = self.create_month_folder(year_folder, month)
-        else:final_folder = year_folder
+        # Tracked downloads are stored as they finish; this only sweeps up files the tracker could not attribute
+        final_folder = self.final_folder(category_name, year, month)
         moved_count = 0
         not_moved_count = 0
-        for file in os.listdir(self.download_dir):
-            if file.endswith('.pdf'):
-                src = os.path.join(self.download_dir, file)
-                dst = os.path.join(final_folder, file)
+        for entry in os.scandir(self.staging_dir):
+            if entry.is_file() and entry.name.endswith('.pdf'):
                 try:
-                    if not os.path.exists(dst): 
-                        shutil.move(src, dst)
-                        moved_count += 1
-                        self.logger.info(f"  Moved file: {file}")
-                    else:
-                        self.logger.info(f"  Removed duplicate file: {file}")
+                    sha256, is_new = self.content_store.add(entry.path, os.path.join(final_folder, entry.name))
+                    moved_count += 1
+                    if is_new: self.logger.info(f"  Stored file: {entry.name}")
+                    else: self.logger.info(f"  Linked duplicate file: {entry.name} ({sha256[:12]})")
                 except Exception as e:
                     not_moved_count += 1
-                    self.logger.warning(f"Failed to move file {file}: {e}")
+                    self.logger.warning(f"Failed to move file {entry.name}: {e}")
         return moved_count, not_moved_count
     
-    def download_pdf_file(self, link):
+    @governed(ok=lambda result: result is not False, by_url=True)
+    @timed("download_pdf_file")
+    def download_pdf_file(self, file_url):
+        original_window = None
         try:
-            initial_count = self.get_current_pdf_count()
-            file_url = link.get_attribute("href")
             if file_url and file_url.endswith('.pdf'):
                 self.logger.info(f"  Downloading PDF: {os.path.basename(file_url)}")
                 original_window = self.driver.current_window_handle
+                window_count = len(self.driver.window_handles)
+                self.download_tracker.start(file_url)
                 self.driver.execute_script("window.open(arguments[0]);", file_url)
-                time.sleep(2)
+                self.wait_for(EC.number_of_windows_to_be(window_count + 1), "window")
                 new_window = [window for window in self.driver.window_handles if window != original_window][0]
                 self.driver.switch_to.window(new_window)
-                time.sleep(3) 
+                self.wait_for(lambda d: self.download_tracker.status(file_url) is not None, "download")
                 self.driver.close()
                 self.driver.switch_to.window(original_window)
-                time.sleep(1)
-                final_count = self.get_current_pdf_count()
-                if final_count > initial_count:
-                    self.logger.info(f"  Successfully downloaded PDF")
-                    return True
+                download = self.download_tracker.finish(file_url)
+                if download:
+                    self.logger.info(f"  Downloaded {os.path.basename(download['path'])}: {download['bytes']} bytes in {download['seconds']:.2f} seconds")
+                    self.metrics.observe("pdf_download", download["seconds"], "network", bytes=download["bytes"])
+                    return download
                 else:
-                    self.logger.warning(f"  PDF download may have failed")
+                    self.logger.warning(f"  PDF download failed or timed out")
                     return False
         except Exception as e:
             self.logger.error(f"Error downloading PDF: {e}")
+            # Leave no PDF tab behind for the retry
+            try:
+                if original_window and self.driver.current_window_handle != original_window:
+                    self.driver.close()
+                    self.driver.switch_to.window(original_window)
+            except: pass
             return False
-        return False
+        return None
     
+    def get_http_headers(self):
+        # Reuse the browser session so the server sees the same client as the navigation
+        cookies = "; ".join(f"{c['name']}={c['value']}" for c in self.driver.get_cookies())
+        user_agent = self.driver.execute_script("return navigator.userAgent;")
+        return {"Cookie": cookies, "User-Agent": user_agent, "Referer": self.driver.current_url}
+
+    @governed(by_url=True)
+    @timed("fetch_pdf", "network")
+    def fetch_pdf(self, file_url, final_folder, headers):
+        file_name = os.path.basename(unquote(urlparse(file_url).path))
+        dst = os.path.join(final_folder, file_name)
+        if os.path.exists(dst) or self.content_store.place(file_url, dst):
+            return dst, os.path.getsize(dst), None
+        tmp = dst + ".part"
+        digest = hashlib.sha256()
+        size = 0
+        response = self.http.request("GET", file_url, headers=headers, preload_content=False)
+        try:
+            if response.status != 200:
+                raise HTTPStatusError(response.status, f"HTTP {response.status} for {file_url}")
+            expected = response.headers.get("Content-Length")
+            with open(tmp, "wb") as f:
+                for chunk in response.stream(64 * 1024):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        finally: response.release_conn()
+        try:
+            if expected is not None and int(expected) != size:
+                raise IOError(f"Size mismatch for {file_name}: expected {expected}, got {size}")
+            with open(tmp, "rb") as f:
+                if f.read(4) != b"%PDF":
+                    raise IOError(f"Not a PDF: {file_name}")
+        except Exception:
+            os.remove(tmp)
+            raise
+        self.content_store.add(tmp, dst, file_url, digest.hexdigest())
+        return dst, size, digest.hexdigest()
+
+    def submit_http_downloads(self, file_key, file_urls, category_name, year, month=None):
+        final_folder = self.final_folder(category_name, year, month)
+        headers = self.get_http_headers()
+        futures = [(url, self.download_pool.submit(self.fetch_pdf, url, final_folder, headers)) for url in file_urls]
+        self.pending_downloads.append((file_key, futures))
+
+    def collect_http_downloads(self, block=False):
+        files_downloaded = 0
+        still_pending = []
+        for file_key, futures in self.pending_downloads:
+            if not block and not all(future.done() for _, future in futures):
+                still_pending.append((file_key, futures))
+                continue
+            failed = 0
+            for url, future in futures:
+                try:
+                    dst, size, sha256 = future.result()
+                    files_downloaded += 1
+                    if sha256: self.logger.info(f"  Downloaded PDF: {os.path.basename(dst)} ({size} bytes, sha256 {sha256[:12]})")
+                    else: self.logger.info(f"  Already present: {os.path.basename(dst)}")
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"  Error downloading PDF {url}: {e}")
+            # Only mark the case done once every file landed, so a resume retries partial cases
+            if not failed:
+                self.current_state[file_key] = "processed"
+            else: self.failed_cases += 1
+        self.pending_downloads = still_pending
+        return files_downloaded
+
+    def process_case(self, case_button, page_num, category_name, year, month=None):
+        case_title = case_button['text']
+        file_key = f"{category_name}_{year}_{month}_{case_title}" if month else f"{category_name}_{year}_{case_title}"
+        if (self.resume or self.incremental) and self.current_state.get(file_key) == "processed":
+            return 1, 0
+        if self.phase == "enumerate" and self.manifest.has_case(file_key):
+            return 1, 0
+        self.logger.info(f"    Processing case: {case_title}")
+        files_downloaded = 0
+        failed = 0
+        self.show_table_page("example4", page_num - 1)
+        if not self.click_row_button("example4", case_button['row'], case_title):
+            self.failed_cases += 1
+            return 0, 0
+        file_urls = self.collect_pdf_links()
+        if self.phase == "enumerate":
+            new_urls = self.manifest.record_case(file_key, category_name, year, month, case_title, file_urls)
+            self.logger.info(f"    Recorded {len(file_urls)} PDF links ({new_urls} new)")
+            self.current_state[file_key] = "processed"
+        elif self.download_mode == "http":
+            self.submit_http_downloads(file_key, file_urls, category_name, year, month)
+            files_downloaded = self.collect_http_downloads()
+        else:
+            final_folder = self.final_folder(category_name, year, month)
+            for link_idx, file_url in enumerate(file_urls):
+                try:
+                    if self.content_store.place(file_url, os.path.join(final_folder, os.path.basename(unquote(urlparse(file_url).path)))):
+                        files_downloaded += 1
+                        self.logger.info(f"    Already stored PDF {link_idx + 1}/{len(file_urls)}")
+                        continue
+                    download = self.download_pdf_file(file_url)
+                    if not download:
+                        failed += 1
+                        continue
+                    self.content_store.add(download['path'], os.path.join(final_folder, os.path.basename(download['path'])), file_url)
+                    files_downloaded += 1
+                    self.logger.info(f"    Downloaded PDF {link_idx + 1}/{len(file_urls)}")
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"    Error downloading PDF {link_idx + 1}: {e}")
+            # As in HTTP mode, a case with a missing file stays unprocessed so a resume retries it
+            if not failed: self.current_state[file_key] = "processed"
+            else: self.failed_cases += 1
+        if not self.click_back_button("example4") and not self.supervisor.restart("could not return to the case list"):
+            raise BrowserLostError("Lost the case list and could not return to it")
+        return 1, files_downloaded
+
     def download_case_files(self, category_name, year, month=None):
         cases_processed = 0
         files_downloaded = 0
         try:
-            self.set_display_length("example4_length", "50")  # Reduced page size for faster loading
-            time.sleep(0.3)
+            self.show_table_page("example4")
             page_num = 1
             while True:
-                rows = self.driver.find_elements(By.XPATH, '//*[@id="example4"]/tbody/tr')
-                if not rows: break
-                self.logger.info(f"    Processing {len(rows)} cases on page {page_num}")
-                for idx in range(len(rows)):
+                case_buttons = self.table_buttons("example4", column=1)
+                if not case_buttons: break
+                self.logger.info(f"    Processing {len(case_buttons)} cases on page {page_num}")
+                for idx, case_button in enumerate(case_buttons):
+                    self.supervisor.checkpoint(category_name, year, month, page_num - 1)
                     try:
-                        self.set_display_length("example4_length", "50")
-                        time.sleep(0.2)
-                        rows = self.driver.find_elements(By.XPATH, '//*[@id="example4"]/tbody/tr')
-                        if idx >= len(rows):  break
-                        row = rows[idx]
-                        case_button = row.find_element(By.XPATH, './td[2]/button')
-                        case_title = case_button.text.strip()
-                        file_key = f"{category_name}_{year}_{month}_{case_title}" if month else f"{category_name}_{year}_{case_title}"
-                        if self.resume and self.current_state.get(file_key) == "processed":
-                            cases_processed += 1
-                            continue
-                        self.logger.info(f"    Processing case: {case_title}")
-                        self.safe_click(case_button)
-                        pdf_links = self.driver.find_elements(By.XPATH, '//table//tr//td[2]/a')
-                        for link_idx, link in enumerate(pdf_links):
-                            try:
-                                if self.download_pdf_file(link):
-                                    files_downloaded += 1
-                                    self.logger.info(f"    Downloaded PDF {link_idx + 1}/{len(pdf_links)}")
-                            except Exception as e:
-                                self.logger.error(f"    Error downloading PDF {link_idx + 1}: {e}")
-                                continue
-                        cases_processed += 1
-                        self.current_state[file_key] = "processed"
-                        self.save_state()
-                        self.click_back_button()
-                        time.sleep(0.3)
+                        cases, files = self.process_case(case_button, page_num, category_name, year, month)
+                    except BrowserLostError: raise
                     except Exception as e:
                         self.logger.error(f"Error processing case {idx}: {e}")
-                        continue
+                        if not self.supervisor.recover():
+                            self.failed_cases += 1
+                            continue
+                        # The browser was restarted at this page: give the case one more try
+                        try: cases, files = self.process_case(case_button, page_num, category_name, year, month)
+                        except Exception as e:
+                            self.logger.error(f"Error processing case {idx} after browser restart: {e}")
+                            self.failed_cases += 1
+                            continue
+                    cases_processed += cases
+                    files_downloaded += files
                 if month: self.logger.info(f"    Month {month} - Page {page_num}: {cases_processed} cases processed")
                 else:self.logger.info(f"    Year {year} - Page {page_num}: {cases_processed} cases processed")
-                if not self.handle_pagination("example4"):break
+                if not self.handle_pagination("example4", page_num):break
                 page_num += 1
-        except Exception as e: self.logger.error(f"Error processing cases: {e}")
+        except BrowserLostError: raise
+        except Exception as e:
+            self.logger.error(f"Error processing cases: {e}")
+            self.failed_cases += 1
+        if self.download_mode == "http":
+            files_downloaded += self.collect_http_downloads(block=True)
         return cases_processed, files_downloaded
     
     def process_month_table(self, category_name, year):
@@ -280,27 +1584,30 @@ class KHCJudgmentDownloader:
         total_files_downloaded = 0
         months_processed = 0
         try:
-            self.set_display_length("example3_length", "50")
-            time.sleep(0.3)
+            self.show_table_page("example3")
             page_num = 1
             while True:
-                month_buttons = self.driver.find_elements(By.XPATH, '//*[@id="example3"]/tbody/tr/td/button')
+                month_buttons = self.table_buttons("example3")
                 if not month_buttons: return 0, 0, 0
                 self.logger.info(f"  Found {len(month_buttons)} months on page {page_num}")
-                for month_idx in range(len(month_buttons)):
+                for month_idx, month_btn in enumerate(month_buttons):
                     try:
-                        self.set_display_length("example3_length", "50")
-                        time.sleep(0.2)
-                        month_buttons = self.driver.find_elements(By.XPATH, '//*[@id="example3"]/tbody/tr/td/button')
-                        if month_idx >= len(month_buttons): break
-                        month_btn = month_buttons[month_idx]
-                        month_text = month_btn.text.strip()
+                        self.supervisor.checkpoint(category_name, year)
+                        month_text = self.node_label(month_btn)
                         month_key = f"{category_name}_{year}_{month_text}"
-                        if self.resume and self.current_state.get(f"{month_key}_completed"):
+                        month_count = self.node_count(month_btn)
+                        if self.is_completed(f"{month_key}_completed"):
                             self.logger.info(f"  Skipping already processed month: {month_text}")
                             continue
+                        if not self.node_changed(f"count_{month_key}", month_count):
+                            self.logger.info(f"  Skipping unchanged month: {month_text} [{month_count}]")
+                            continue
                         self.logger.info(f"  Processing month: {month_text}")
-                        self.safe_click(month_btn)
+                        self.show_table_page("example3", page_num - 1)
+                        if not self.click_row_button("example3", month_btn['row'], month_btn['text']):
+                            self.failed_cases += 1
+                            continue
+                        failed_before = self.failed_cases
                         month_cases, month_files = self.download_case_files(category_name, year, month_text)
                         moved_count, not_moved_count = self.move_files_to_final_location(category_name, year, month_text)
                         total_cases += month_cases
@@ -309,35 +1616,44 @@ class KHCJudgmentDownloader:
                         self.logger.info(f"  Month {month_text} completed:")
                         self.logger.info(f"    Cases processed: {month_cases}")
                         self.logger.info(f"    Files moved: {moved_count}")
-                        self.current_state[f"{month_key}_completed"] = True
-                        self.save_state()
-                        self.click_back_button()
-                        time.sleep(0.3)
+                        if self.failed_cases == failed_before:
+                            self.current_state[f"{month_key}_completed"] = True
+                            if month_count is not None: self.current_state[f"count_{month_key}"] = month_count
+                        else: self.logger.warning(f"  Month {month_text} has unfinished cases; it will be crawled again")
+                        if not self.click_back_button("example3"): raise RuntimeError("Could not return to the month list")
+                    except BrowserLostError: raise
                     except Exception as e:
                         self.logger.error(f"  Error processing month {month_idx}: {e}")
+                        self.failed_cases += 1
                         continue
-                if not self.handle_pagination("example3"):break
+                if not self.handle_pagination("example3", page_num):break
                 page_num += 1
             return months_processed, total_cases, total_files_downloaded
+        except BrowserLostError: raise
         except Exception as e:
             self.logger.error(f"Error processing month table: {e}")
+            self.failed_cases += 1
             return months_processed, total_cases, total_files_downloaded
     
     def process_year(self, year_btn, year_idx, total_years, page_num, category_name):
-        year_text = year_btn.text.strip().split('[')[0].strip()
-        if not year_text:
-            year_text = f"Year_{year_idx + 1}"
+        year_text = self.year_label(year_btn, year_idx)
         year_key = f"{category_name}_{year_text}"
-        if self.resume and self.current_state.get(f"{year_key}_completed"):
+        year_count = self.node_count(year_btn)
+        if self.is_completed(f"{year_key}_completed"):
             self.logger.info(f"  Skipping already processed year: {year_text}")
             return 0, 0, 0
+        if not self.node_changed(f"count_{year_key}", year_count):
+            self.logger.info(f"  Skipping unchanged year: {year_text} [{year_count}]")
+            return 0, 0, 0
         start_time = time.time()
         self.logger.info("=" * 70)
         self.logger.info(f"PROCESSING YEAR: {year_text}")
         self.logger.info(f"Category: {category_name}")
         self.logger.info(f"Position: {year_idx + 1}/{total_years} on page {page_num}")
         self.logger.info("=" * 70)
-        self.safe_click(year_btn)
+        if not self.click_row_button("example1", year_btn['row'], year_btn['text']):
+            raise RuntimeError(f"Could not open year {year_text}")
+        failed_before = self.failed_cases
         cases_processed = 0
         files_downloaded = 0
         months_processed = 0
@@ -348,6 +1664,7 @@ class KHCJudgmentDownloader:
             if months_processed == 0:
                 self.logger.info("  No months found, processing cases directly...")
                 cases_processed, files_downloaded = self.download_case_files(category_name, year_text)
+        except BrowserLostError: raise
         except:
             self.logger.info("  No month table found, processing cases directly...")
             cases_processed, files_downloaded = self.download_case_files(category_name, year_text)
@@ -360,53 +1677,90 @@ class KHCJudgmentDownloader:
         self.logger.info(f"  Files moved: {moved_count}")
         self.logger.info(f"  Time taken: {processing_time:.2f} seconds")
         self.logger.info("-" * 60)
-        self.current_state[f"{year_key}_completed"] = True
-        self.save_state()
-        self.click_back_button()
-        time.sleep(0.5)
+        if self.failed_cases == failed_before:
+            self.current_state[f"{year_key}_completed"] = True
+            if year_count is not None: self.current_state[f"count_{year_key}"] = year_count
+        else: self.logger.warning(f"  Year {year_text} has {self.failed_cases - failed_before} unfinished case(s) or month(s); it will be crawled again")
+        if not self.click_back_button("example1"): raise RuntimeError("Could not return to the year list")
         return cases_processed, files_downloaded, months_processed
     
     def process_all_years(self, category_name):
         self.logger.info(f"Starting year processing for category: {category_name}")
         total_years_processed = 0
         total_cases_processed = 0
+        total_files_downloaded = 0
         total_months_processed = 0
         try:
-            self.set_display_length("example1_length", "50")
-            time.sleep(0.5)
+            self.show_table_page("example1")
             page_num = 1
             while True:
-                year_buttons = self.driver.find_elements(By.XPATH, '//*[@id="example1"]/tbody/tr/td/button')
+                year_buttons = self.table_buttons("example1")
                 total_years_on_page = len(year_buttons)
                 if total_years_on_page == 0:  break
                 self.logger.info(f"Processing year page {page_num} for category '{category_name}'")
                 self.logger.info(f"  Found {total_years_on_page} years on page {page_num}")
-                for year_idx in range(total_years_on_page):
+                for year_idx, year_btn in enumerate(year_buttons):
                     try:
-                        self.set_display_length("example1_length", "50")
-                        time.sleep(0.3)
-                        year_buttons = self.driver.find_elements(By.XPATH, '//*[@id="example1"]/tbody/tr/td/button')
-                        if year_idx >= len(year_buttons): break
-                        year_btn = year_buttons[year_idx]
+                        self.supervisor.checkpoint(category_name)
+                        self.show_table_page("example1", page_num - 1)
                         cases, files, months = self.process_year(year_btn, year_idx, total_years_on_page, page_num, category_name)
                         total_years_processed += 1
                         total_cases_processed += cases
                         total_files_downloaded += files
                         total_months_processed += months
+                    except BrowserLostError: raise
                     except Exception as e:
                         self.logger.error(f"Failed to process year {year_idx + 1}: {e}")
+                        self.failed_cases += 1
                         try:
-                            self.click_back_button()
-                            time.sleep(0.5)
+                            self.click_back_button("example1")
                         except: pass
                         continue
-                if not self.handle_pagination("example1"): break
+                if not self.handle_pagination("example1", page_num): break
                 page_num += 1
             return total_years_processed, total_cases_processed, total_files_downloaded, total_months_processed
+        except BrowserLostError: raise
         except Exception as e:
             self.logger.error(f"Error processing years for category {category_name}: {e}")
+            self.failed_cases += 1
             return total_years_processed, total_cases_processed, total_files_downloaded, total_months_processed
     
+    def list_years(self, category_name):
+        years = []
+        try:
+            self.show_table_page("example1")
+            page_num = 1
+            while True:
+                for year_idx, year_btn in enumerate(self.table_buttons("example1")):
+                    years.append(self.year_label(year_btn, year_idx))
+                if not self.handle_pagination("example1", page_num): break
+                page_num += 1
+        except Exception as e:
+            self.logger.error(f"Error listing years for category {category_name}: {e}")
+        return years
+
+    def find_row(self, table_id, label, labeler):
+        # Pages through the table until a row's label matches; leaves that page showing
+        self.show_table_page(table_id)
+        page_num = 1
+        while True:
+            buttons = self.table_buttons(table_id)
+            for idx, btn in enumerate(buttons):
+                if labeler(btn, idx) == label: return btn, idx, len(buttons), page_num
+            if not self.handle_pagination(table_id, page_num): return None
+            page_num += 1
+
+    def process_category_year(self, category_name, year_text):
+        self.navigate_to_website()
+        if not self.select_category(category_name):
+            return None
+        year_row = self.find_row("example1", year_text, self.year_label)
+        if year_row is None:
+            self.logger.error(f"Year '{year_text}' not found in category '{category_name}'")
+            return None
+        year_btn, year_idx, total_years, page_num = year_row
+        return self.process_year(year_btn, year_idx, total_years, page_num, category_name)
+
     def process_all_categories(self):
         categories = self.get_all_categories()
         if not categories:
@@ -414,7 +1768,7 @@ class KHCJudgmentDownloader:
             return
         total_stats = {'categories_processed': 0,'total_years': 0,'total_months': 0,'total_cases': 0}
         for category_idx, category_name in enumerate(categories, 1):
-            if self.resume and self.current_state.get(f"category_{category_name}_completed"):
+            if self.is_completed(f"category_{category_name}_completed"):
                 self.logger.info(f"Skipping already processed category: {category_name}")
                 continue
             self.logger.info("\n" + "=" * 80)
@@ -424,6 +1778,7 @@ class KHCJudgmentDownloader:
             if not self.select_category(category_name):
                 self.logger.error(f"Failed to select category: {category_name}")
                 continue
+            failed_before = self.failed_cases
             years, cases, files, months = self.process_all_years(category_name)
             category_time = time.time() - category_start_time
             total_stats['categories_processed'] += 1
@@ -438,8 +1793,7 @@ class KHCJudgmentDownloader:
             self.logger.info(f"  Files downloaded: {files}")
             self.logger.info(f"  Time taken: {category_time:.2f} seconds")
             self.logger.info("*" * 70)
-            self.current_state[f"category_{category_name}_completed"] = True
-            self.save_state()
+            if self.failed_cases == failed_before: self.current_state[f"category_{category_name}_completed"] = True
             self.navigate_to_website()
         return total_stats
 
@@ -448,7 +1802,11 @@ class KHCJudgmentDownloader:
         self.logger.info(f"=== KHC Judgment Downloader Started at {start_time} ===")
         self.logger.info(f"Resume mode: {self.resume}")
         try:
+            self.indexer = self.start_indexer(self.index_workers)
             self.navigate_to_website()
+            if self.phase == "download":
+                self.download_from_manifest()
+                return
             total_stats = self.process_all_categories()
             end_time = datetime.now()
             duration = end_time - start_time
@@ -462,18 +1820,590 @@ class KHCJudgmentDownloader:
                 self.logger.info(f"Total cases processed: {total_stats['total_cases']}")
             else: self.logger.info("No statistics available - process may have been interrupted")
             self.logger.info(f"Total time taken: {duration}")
+            self.log_metrics()
+            self.log_page_load_stats()
+            self.logger.info(f"Popups dismissed: {self.popups_dismissed}")
+            self.logger.info(f"Content store: {self.content_store.summary()}")
+            self.logger.info(f"Request governor: {self.governor.summary()}")
+            if self.phase == "enumerate":
+                new_cases, new_pdfs = self.manifest.changes_since(start_time.timestamp())
+                self.logger.info(f"Manifest: {new_cases} new cases, {new_pdfs} new PDF links this run; totals {self.manifest.summary()}")
             self.logger.info(f"Files saved at: {self.download_dir}")
             self.logger.info(f"=== Process completed at {end_time} ===")
-            if os.path.exists(self.state_file):
-                os.remove(self.state_file)
+            if not self.incremental: self.current_state.clear()
+        except Exception as e:
+            self.logger.error(f"Fatal error in main process: {e}")
+            self.logger.info("Download state saved. You can resume later using resume=True")
+        finally: self.close()
+
+    def download_from_manifest(self, retry_failed=True, batch_size=500):
+        start_time = time.time()
+        if retry_failed:
+            self.logger.info(f"Retrying {self.manifest.retry_failed()} previously failed downloads")
+        headers = self.get_http_headers()
+        downloaded = failed = 0
+        with ThreadPoolExecutor(max_workers=self.download_workers) as pool:
+            while True:
+                # Work in batches so memory stays flat however large the manifest is
+                batch = self.manifest.pending(batch_size)
+                if not batch: break
+                futures = []
+                for case_key, url, category_name, year, month in batch:
+                    final_folder = self.final_folder(category_name, year, month)
+                    futures.append((case_key, url, pool.submit(self.fetch_pdf, url, final_folder, headers)))
+                for case_key, url, future in futures:
+                    try:
+                        dst, size, sha256 = future.result()
+                        self.manifest.mark_done(case_key, url, dst, size, sha256)
+                        downloaded += 1
+                    except Exception as e:
+                        self.manifest.mark_failed(case_key, url, e)
+                        failed += 1
+                        self.logger.error(f"  Error downloading PDF {url}: {e}")
+                self.logger.info(f"  Manifest download progress: {downloaded} downloaded, {failed} failed")
+        processing_time = time.time() - start_time
+        self.logger.info("\n" + "=" * 80)
+        self.logger.info("MANIFEST DOWNLOAD SUMMARY:")
+        self.logger.info("=" * 80)
+        self.logger.info(f"Files downloaded: {downloaded}")
+        self.logger.info(f"Files failed: {failed}")
+        self.logger.info(f"Manifest totals: {self.manifest.summary()}")
+        self.logger.info(f"Time taken: {processing_time:.2f} seconds")
+        return downloaded, failed
+
+    def close(self):
+        if self.download_pool: self.download_pool.shutdown(wait=True)
+        if self.manifest: self.manifest.close()
+        if self.indexer: self.indexer.stop()
+        self.content_store.close()
+        self.metrics.sleep(2, "close")
+        self.driver.quit()
+        self.metrics.close()
+
+class CrawlScheduler:
+    def __init__(self, download_dir=None, workers=2, resume=False, **downloader_options):
+        if download_dir is None:
+            download_dir = os.path.join(os.getcwd(), 'KHC_Judgments')
+        self.download_dir = download_dir
+        self.workers = workers
+        self.resume = resume
+        # Incremental workers decide per year from the stored counts, so planning must not drop units
+        self.skip_completed = resume and not downloader_options.get('incremental')
+        self.downloader_options = downloader_options
+        self.units = queue.Queue()
+        self.progress_lock = threading.Lock()
+        self.progress = {'units_total': 0, 'units_done': 0, 'units_failed': 0, 'total_months': 0, 'total_cases': 0, 'total_files': 0}
+        self.category_years = {}
+        # False once a category could not be listed, so the state is kept for the next run
+        self.planned_all = True
+        self.state = None
+        self.unit_attempts = {}
+        if not os.path.exists(download_dir): os.makedirs(download_dir)
+        # One metrics stream and one per-host governor for all workers
+        self.metrics = CrawlMetrics(os.path.join(download_dir, 'metrics.jsonl'), os.path.join(download_dir, 'metrics.prom'), downloader_options.pop('metrics_port', None))
+        self.governor = RequestGovernor(metrics=self.metrics)
+        self.index_workers = downloader_options.pop('index_workers', 0)
+
+    def create_worker(self, worker_idx):
+        staging_dir = os.path.join(self.download_dir, '.staging', f"worker_{worker_idx}")
+        return KHCJudgmentDownloader(self.download_dir, resume=self.resume, staging_dir=staging_dir, state=self.state, metrics=self.metrics, governor=self.governor, **self.downloader_options)
+
+    def plan_units(self, downloader):
+        downloader.navigate_to_website()
+        for category_name in downloader.get_all_categories():
+            if self.skip_completed and self.state.get(f"category_{category_name}_completed"):
+                downloader.logger.info(f"Skipping already processed category: {category_name}")
+                continue
+            if not downloader.select_category(category_name):
+                downloader.logger.error(f"Failed to select category: {category_name}")
+                self.planned_all = False
+                downloader.navigate_to_website()
+                continue
+            years = downloader.list_years(category_name)
+            self.category_years[category_name] = set(years)
+            for year_text in years:
+                if self.skip_completed and self.state.get(f"{category_name}_{year_text}_completed"): continue
+                self.units.put((category_name, year_text))
+                self.progress['units_total'] += 1
+            downloader.navigate_to_website()
+
+    def work(self, worker_idx, downloader=None):
+        try:
+            if downloader is None: downloader = self.create_worker(worker_idx)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Worker {worker_idx} failed to start: {e}")
+            return
+        try:
+            while True:
+                try: category_name, year_text = self.units.get_nowait()
+                except queue.Empty: break
+                result = None
+                failed_before = downloader.failed_cases
+                try: result = downloader.process_category_year(category_name, year_text)
+                except Exception as e: downloader.logger.error(f"Worker {worker_idx} failed on {category_name} / {year_text}: {e}")
+                if result is not None and downloader.failed_cases > failed_before:
+                    downloader.logger.error(f"Worker {worker_idx}: {downloader.failed_cases - failed_before} case(s) or month(s) failed in {category_name} / {year_text}")
+                    result = None
+                if result is None and self.retry_unit((category_name, year_text), downloader): continue
+                with self.progress_lock:
+                    if result is None: self.progress['units_failed'] += 1
+                    else:
+                        cases, files, months = result
+                        self.progress['units_done'] += 1
+                        self.progress['total_cases'] += cases
+                        self.progress['total_files'] += files
+                        self.progress['total_months'] += months
+                        self.mark_category_if_complete(category_name)
+                    downloader.logger.info(f"Worker {worker_idx}: {category_name} / {year_text} finished - {self.progress['units_done']}/{self.progress['units_total']} units done, {self.progress['units_failed']} failed")
+        finally: downloader.close()
+
+    def retry_unit(self, unit, downloader):
+        # Failed units go back on the queue after a backoff; PDFs they already stored are linked, not fetched again
+        with self.progress_lock:
+            attempt = self.unit_attempts.get(unit, 0)
+            if attempt >= self.governor.retries: return False
+            self.unit_attempts[unit] = attempt + 1
+        delay = self.governor.backoff_delay(attempt)
+        downloader.logger.warning(f"Requeueing {unit[0]} / {unit[1]} in {delay:.1f}s (retry {attempt + 1}/{self.governor.retries})")
+        self.metrics.sleep(delay, "backoff")
+        self.units.put(unit)
+        return True
+
+    def mark_category_if_complete(self, category_name):
+        if all(self.state.get(f"{category_name}_{year_text}_completed") for year_text in self.category_years.get(category_name, ())):
+            self.state[f"category_{category_name}_completed"] = True
+
+    def run(self):
+        start_time = datetime.now()
+        planner = self.create_worker(0)
+        self.state = planner.current_state
+        planner.logger.info(f"=== KHC Judgment Downloader Started at {start_time} with {self.workers} workers ===")
+        try: self.plan_units(planner)
+        except Exception as e:
+            planner.logger.error(f"Fatal error while planning work units: {e}")
+            planner.close()
+            return self.progress
+        planner.logger.info(f"Planned {self.progress['units_total']} (category, year) units")
+        threads = [threading.Thread(target=self.work, args=(0, planner), name="worker_0")]
+        threads += [threading.Thread(target=self.work, args=(worker_idx,), name=f"worker_{worker_idx}") for worker_idx in range(1, self.workers)]
+        indexer = planner.start_indexer(self.index_workers)
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        if indexer: indexer.stop()
+        complete = self.planned_all and not self.progress['units_failed'] and self.progress['units_done'] == self.progress['units_total']
+        if complete and not self.downloader_options.get('incremental'): self.state.clear()
+        duration = datetime.now() - start_time
+        planner.logger.info("\n" + "=" * 80)
+        planner.logger.info("FINAL DOWNLOAD SUMMARY:")
+        planner.logger.info("=" * 80)
+        planner.logger.info(f"Units processed: {self.progress['units_done']}/{self.progress['units_total']} ({self.progress['units_failed']} failed)")
+        planner.logger.info(f"Total months processed: {self.progress['total_months']}")
+        planner.logger.info(f"Total cases processed: {self.progress['total_cases']}")
+        planner.logger.info(f"Total files downloaded: {self.progress['total_files']}")
+        planner.logger.info(f"Total time taken: {duration}")
+        return self.progress
+
+class ShardPlanner:
+    # Crawls (category, year) units leased from a LeaseStore, one unit at a time with one browser. Start it in as many
+    # processes or on as many hosts as you like against the same lease file; a heartbeat thread keeps the current lease
+    # alive, and units whose worker died are taken over once their lease expires.
+    def __init__(self, download_dir=None, lease_db=None, worker_id=None, lease_seconds=1800, max_attempts=3, categories=None, years=None, replan=False, **downloader_options):
+        if download_dir is None:
+            download_dir = os.path.join(os.getcwd(), 'KHC_Judgments')
+        if not os.path.exists(download_dir): os.makedirs(download_dir)
+        self.download_dir = download_dir
+        self.leases = LeaseStore(lease_db or os.path.join(download_dir, 'leases.db'))
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.categories = list(categories or [])
+        self.years = list(years or [])
+        self.replan = replan
+        # Give --index-workers to one worker per download folder; the indexer itself is not sharded
+        self.index_workers = downloader_options.pop('index_workers', 0)
+        self.downloader_options = downloader_options
+        self.progress = {'units_done': 0, 'units_failed': 0, 'total_months': 0, 'total_cases': 0, 'total_files': 0}
+
+    def plan(self, downloader):
+        # Planning is idempotent, so workers that start together may all plan; later workers reuse the table
+        if self.leases.count(self.categories, self.years) and not self.replan: return
+        downloader.navigate_to_website()
+        units = []
+        for category_name in downloader.get_all_categories():
+            if self.categories and category_name not in self.categories: continue
+            if not downloader.select_category(category_name):
+                downloader.logger.error(f"Failed to select category: {category_name}")
+            else:
+                units += [(category_name, year_text) for year_text in downloader.list_years(category_name) if not self.years or year_text in self.years]
+            downloader.navigate_to_website()
+        downloader.logger.info(f"Planned {len(units)} (category, year) units, {self.leases.plan(units)} new")
+
+    def heartbeat(self, category_name, year_text, done, logger):
+        while not done.wait(self.lease_seconds / 3):
+            if not self.leases.renew(self.worker_id, category_name, year_text, self.lease_seconds):
+                logger.warning(f"Lost the lease on {category_name} / {year_text}; another worker may be crawling it too")
+                return
+
+    def run(self):
+        staging_dir = os.path.join(self.download_dir, '.staging', re.sub(r'[^\w.-]', '_', self.worker_id))
+        downloader = KHCJudgmentDownloader(self.download_dir, staging_dir=staging_dir, **self.downloader_options)
+        logger = downloader.logger
+        logger.info(f"=== Shard worker {self.worker_id} started at {datetime.now()} (categories {self.categories or 'all'}, years {self.years or 'all'}) ===")
+        indexer = downloader.start_indexer(self.index_workers)
+        try:
+            self.plan(downloader)
+            while True:
+                lease = self.leases.acquire(self.worker_id, self.lease_seconds, self.categories, self.years)
+                if lease is None: break
+                category_name, year_text, previous = lease
+                if previous: logger.warning(f"Taking over {category_name} / {year_text} from {previous}, whose lease expired")
+                logger.info(f"Worker {self.worker_id} leased {category_name} / {year_text}")
+                done = threading.Event()
+                threading.Thread(target=self.heartbeat, args=(category_name, year_text, done, logger), daemon=True).start()
+                result, error = None, "unit returned no result"
+                failed_before = downloader.failed_cases
+                try: result = downloader.process_category_year(category_name, year_text)
+                except Exception as e: error = e
+                finally: done.set()
+                # A unit with failed cases goes back to the table instead of being marked done for good
+                if result is not None and downloader.failed_cases > failed_before:
+                    result, error = None, f"{downloader.failed_cases - failed_before} case(s) or month(s) failed"
+                if result is None:
+                    logger.error(f"Worker {self.worker_id} failed on {category_name} / {year_text}: {error}")
+                    self.leases.fail(self.worker_id, category_name, year_text, error, self.max_attempts)
+                    self.progress['units_failed'] += 1
+                    continue
+                cases, files, months = result
+                self.leases.complete(self.worker_id, category_name, year_text)
+                self.progress['units_done'] += 1
+                self.progress['total_cases'] += cases
+                self.progress['total_files'] += files
+                self.progress['total_months'] += months
+            logger.info(f"Worker {self.worker_id} finished: {self.progress}; lease table {self.leases.summary(self.categories, self.years)}")
+        finally:
+            released = self.leases.release(self.worker_id)
+            if released: logger.info(f"Released {released} unfinished lease(s)")
+            self.leases.close()
+            if indexer: indexer.stop()
+            downloader.close()
+        return self.progress
+
+class PageParseError(Exception):
+    pass
+
+class AsyncKHCCrawler(CrawlerBase):
+    # Browserless crawler: replays the form posts behind each table button and parses the returned HTML.
+    # Uses the same state keys and folder layout as KHCJudgmentDownloader, and hands any (category, year)
+    # it cannot parse to a Selenium downloader at the end of the run.
+    def __init__(self, download_dir=None, resume=False, incremental=False, base_url=BASE_URL, concurrency=4, download_concurrency=8, selenium_fallback=True,
+                 metrics=None, metrics_port=None, governor=None, index_workers=0, **fallback_options):
+        if aiohttp is None:
+            raise RuntimeError("AsyncKHCCrawler needs aiohttp and lxml (pip install aiohttp lxml)")
+        if download_dir is None:
+            download_dir = os.path.join(os.getcwd(), 'KHC_Judgments')
+        if not os.path.exists(download_dir): os.makedirs(download_dir)
+        self.download_dir = download_dir
+        self.base_url = base_url
+        self.state_file = os.path.join(download_dir, 'download_state.db')
+        self.legacy_state_file = os.path.join(download_dir, 'download_state.json')
+        self.resume = resume
+        self.incremental = incremental
+        self.concurrency = concurrency
+        self.download_concurrency = download_concurrency
+        self.selenium_fallback = selenium_fallback
+        self.fallback_options = fallback_options
+        self.fallback_units = []
+        # Units that hit fetch errors after the governor's retries; their state is kept for the next run
+        self.failed_units = []
+        self.index_workers = index_workers
+        self.stats = {'categories_processed': 0, 'total_years': 0, 'total_months': 0, 'total_cases': 0, 'total_files': 0}
+        self.setup_logging()
+        self.metrics = self.create_metrics(metrics, metrics_port)
+        self.governor = governor or RequestGovernor(metrics=self.metrics, logger=self.logger)
+        self.host = urlparse(base_url).netloc
+        self.current_state = self.load_state()
+        self.content_store = ContentStore(self.download_dir)
+
+    def parse_table(self, html, table_id, page_url):
+        doc = lxml.html.fromstring(html, base_url=page_url)
+        tables = doc.xpath('//table[@id=$table_id]', table_id=table_id)
+        if not tables:
+            raise PageParseError(f"Table {table_id} not found at {page_url}")
+        rows = []
+        for index, tr in enumerate(tables[0].xpath('./tbody/tr | ./tr')):
+            cells = tr.xpath('./td | ./th')
+            buttons = []
+            for btn in tr.xpath('.//button | .//input[@type="submit"]'):
+                td = btn.xpath('ancestor::td[1]')
+                text = btn.text_content() if btn.tag == 'button' else btn.get('value', '')
+                buttons.append({'row': index, 'column': cells.index(td[0]) if td and td[0] in cells else -1, 'text': " ".join(text.split()),
+                                'id': btn.get('id'), 'name': btn.get('name'), 'value': btn.get('value'), 'onclick': btn.get('onclick'), 'request': self.button_request(btn, page_url)})
+            rows.append({'index': index, 'cells': [" ".join(td.text_content().split()) for td in cells], 'buttons': buttons,
+                         'links': [urljoin(page_url, a.get('href')) for a in tr.xpath('.//a[@href]')]})
+        return rows
+
+    def button_request(self, btn, page_url):
+        forms = btn.xpath('ancestor::form[1]')
+        if not forms: return None
+        form = forms[0]
+        fields = list(form.form_values())
+        if btn.get('name'): fields.append((btn.get('name'), btn.get('value', '')))
+        method = (btn.get('formmethod') or form.get('method') or 'GET').upper()
+        return {'method': method, 'url': urljoin(page_url, btn.get('formaction') or form.get('action') or page_url), 'fields': fields}
+
+    def table_buttons(self, rows, column=None):
+        return [btn for row in rows for btn in row['buttons'] if column is None or btn['column'] == column]
+
+    def node_buttons(self, html, table_id, page_url, expected=None, column=None):
+        # An empty table, or fewer rows than the parent's bracketed count, means the rows are filled in by script
+        buttons = self.table_buttons(self.parse_table(html, table_id, page_url), column)
+        if not buttons and expected != 0:
+            raise PageParseError(f"Table {table_id} at {page_url} has no rows")
+        if expected is not None and len(buttons) < expected:
+            raise PageParseError(f"Table {table_id} at {page_url} has {len(buttons)} rows, expected {expected}")
+        return buttons
+
+    def parse_pdf_links(self, html, page_url):
+        doc = lxml.html.fromstring(html, base_url=page_url)
+        links = [urljoin(page_url, href) for href in doc.xpath('//table//tr//td[2]/a/@href')]
+        return [href for href in links if href.endswith('.pdf')]
+
+    @governed()
+    async def fetch(self, method, url, fields=None):
+        async with self.request_limit:
+            with self.metrics.timer("fetch_page", "network"):
+                if method == 'POST': request = self.session.post(url, data=fields or [])
+                else: request = self.session.get(url, params=fields or None)
+                async with request as response:
+                    response.raise_for_status()
+                    return await response.text(), str(response.url)
+
+    async def open_button(self, btn):
+        if not btn.get('request'):
+            raise PageParseError(f"No form behind button '{btn['text']}' (onclick={btn.get('onclick')!r})")
+        request = btn['request']
+        return await self.fetch(request['method'], request['url'], request['fields'])
+
+    @governed(by_url=True)
+    async def fetch_pdf(self, file_url, final_folder):
+        file_name = os.path.basename(unquote(urlparse(file_url).path))
+        dst = os.path.join(final_folder, file_name)
+        if os.path.exists(dst) or self.content_store.place(file_url, dst): return dst, os.path.getsize(dst), None
+        tmp = dst + ".part"
+        digest = hashlib.sha256()
+        size = 0
+        async with self.download_limit:
+            with self.metrics.timer("fetch_pdf", "network"):
+                async with self.session.get(file_url) as response:
+                    response.raise_for_status()
+                    expected = response.content_length
+                    with open(tmp, "wb") as f:
+                        async for chunk in response.content.iter_chunked(64 * 1024):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+        try:
+            if expected is not None and expected != size:
+                raise IOError(f"Size mismatch for {file_name}: expected {expected}, got {size}")
+            with open(tmp, "rb") as f:
+                if f.read(4) != b"%PDF":
+                    raise IOError(f"Not a PDF: {file_name}")
+        except Exception:
+            os.remove(tmp)
+            raise
+        self.content_store.add(tmp, dst, file_url, digest.hexdigest())
+        return dst, size, digest.hexdigest()
+
+    async def crawl_cases(self, html, page_url, category_name, year, month=None, expected=None):
+        cases_processed = files_downloaded = cases_failed = 0
+        for case_button in self.node_buttons(html, "example4", page_url, expected, column=1):
+            case_title = case_button['text']
+            file_key = f"{category_name}_{year}_{month}_{case_title}" if month else f"{category_name}_{year}_{case_title}"
+            if (self.resume or self.incremental) and self.current_state.get(file_key) == "processed":
+                cases_processed += 1
+                continue
+            try: case_html, case_url = await self.open_button(case_button)
+            except PageParseError: raise
+            except Exception as e:
+                self.logger.error(f"    Error opening case {case_title}: {e}")
+                cases_failed += 1
+                continue
+            final_folder = self.final_folder(category_name, year, month)
+            results = await asyncio.gather(*[self.fetch_pdf(url, final_folder) for url in self.parse_pdf_links(case_html, case_url)], return_exceptions=True)
+            failed = [result for result in results if isinstance(result, Exception)]
+            for error in failed: self.logger.error(f"    Error downloading PDF for {case_title}: {error}")
+            files_downloaded += len(results) - len(failed)
+            cases_processed += 1
+            if not failed: self.current_state[file_key] = "processed"
+            else: cases_failed += 1
+        return cases_processed, files_downloaded, cases_failed
+
+    async def crawl_year(self, category_name, year_btn, year_idx):
+        year_text = self.year_label(year_btn, year_idx)
+        year_key = f"{category_name}_{year_text}"
+        year_count = self.node_count(year_btn)
+        if self.is_completed(f"{year_key}_completed") or not self.node_changed(f"count_{year_key}", year_count):
+            self.logger.info(f"  Skipping year: {category_name} / {year_text}")
+            return True
+        try:
+            html, page_url = await self.open_button(year_btn)
+            # No month table means the cases hang straight off the year; an empty one ends in the case table's PageParseError
+            try: month_buttons = self.node_buttons(html, "example3", page_url)
+            except PageParseError: month_buttons = []
+            cases_processed = files_downloaded = cases_failed = 0
+            for month_btn in month_buttons:
+                month_text = self.node_label(month_btn)
+                month_key = f"{category_name}_{year_text}_{month_text}"
+                month_count = self.node_count(month_btn)
+                if self.is_completed(f"{month_key}_completed") or not self.node_changed(f"count_{month_key}", month_count): continue
+                try: month_html, month_url = await self.open_button(month_btn)
+                except PageParseError: raise
+                except Exception as e:
+                    self.logger.error(f"  Error opening {category_name} / {year_text} / {month_text}: {e}")
+                    cases_failed += 1
+                    continue
+                month_cases, month_files, month_failed = await self.crawl_cases(month_html, month_url, category_name, year_text, month_text, month_count)
+                cases_processed += month_cases
+                files_downloaded += month_files
+                cases_failed += month_failed
+                self.stats['total_months'] += 1
+                if month_failed: continue
+                self.current_state[f"{month_key}_completed"] = True
+                if month_count is not None: self.current_state[f"count_{month_key}"] = month_count
+            if not month_buttons:
+                cases_processed, files_downloaded, cases_failed = await self.crawl_cases(html, page_url, category_name, year_text, expected=year_count)
+        except PageParseError as e:
+            self.logger.warning(f"  Could not parse {category_name} / {year_text}, leaving it to Selenium: {e}")
+            self.fallback_units.append((category_name, year_text))
+            return False
+        except Exception as e:
+            self.logger.error(f"  Error crawling {category_name} / {year_text}: {e}")
+            self.failed_units.append((category_name, year_text))
+            return False
+        self.stats['total_years'] += 1
+        self.stats['total_cases'] += cases_processed
+        self.stats['total_files'] += files_downloaded
+        self.logger.info(f"  Year {category_name} / {year_text} completed: {cases_processed} cases, {files_downloaded} files, {cases_failed} failed")
+        # A year with failed cases keeps no count or completion flag, so the next run looks at it again
+        if cases_failed:
+            self.failed_units.append((category_name, year_text))
+            return False
+        self.current_state[f"{year_key}_completed"] = True
+        if year_count is not None: self.current_state[f"count_{year_key}"] = year_count
+        return True
+
+    async def crawl_category(self, category_btn):
+        category_name = category_btn['text']
+        if self.is_completed(f"category_{category_name}_completed"):
+            self.logger.info(f"Skipping already processed category: {category_name}")
+            return
+        html, page_url = await self.open_button(category_btn)
+        year_buttons = self.node_buttons(html, "example1", page_url)
+        self.logger.info(f"Category {category_name}: {len(year_buttons)} years")
+        done = await asyncio.gather(*[self.crawl_year(category_name, year_btn, year_idx) for year_idx, year_btn in enumerate(year_buttons)])
+        self.stats['categories_processed'] += 1
+        if all(done): self.current_state[f"category_{category_name}_completed"] = True
+
+    async def crawl(self):
+        self.request_limit = asyncio.Semaphore(self.concurrency)
+        self.download_limit = asyncio.Semaphore(self.download_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency + self.download_concurrency)
+        timeout = aiohttp.ClientTimeout(total=None, connect=10, sock_read=60)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as self.session:
+            html, page_url = await self.fetch('GET', self.base_url)
+            category_buttons = [btn for btn in self.node_buttons(html, "example", page_url) if btn['text']]
+            self.logger.info(f"Found {len(category_buttons)} categories")
+            results = await asyncio.gather(*[self.crawl_category(btn) for btn in category_buttons], return_exceptions=True)
+            for btn, result in zip(category_buttons, results):
+                if isinstance(result, PageParseError):
+                    self.logger.warning(f"Could not parse category {btn['text']}, leaving it to Selenium: {result}")
+                    self.fallback_units.append((btn['text'], None))
+                elif isinstance(result, Exception):
+                    self.logger.error(f"Error crawling category {btn['text']}: {result}")
+                    self.failed_units.append((btn['text'], None))
+
+    def run_selenium_fallback(self):
+        self.logger.info(f"Handing {len(self.fallback_units)} units to the Selenium downloader")
+        downloader = KHCJudgmentDownloader(self.download_dir, resume=True, incremental=self.incremental, base_url=self.base_url, state=self.current_state, metrics=self.metrics, governor=self.governor, **self.fallback_options)
+        try:
+            for category_name, year_text in self.fallback_units:
+                if year_text is not None:
+                    downloader.process_category_year(category_name, year_text)
+                    continue
+                downloader.navigate_to_website()
+                if downloader.select_category(category_name):
+                    downloader.process_all_years(category_name)
+        finally: downloader.close()
+
+    def run(self):
+        start_time = datetime.now()
+        self.logger.info(f"=== KHC Judgment Downloader (HTTP) Started at {start_time} ===")
+        indexer = self.start_indexer(self.index_workers)
+        try:
+            try: asyncio.run(self.crawl())
+            except PageParseError as e:
+                # Not even the category table parsed: the whole crawl has to go through the browser
+                self.logger.warning(f"Could not parse the start page, falling back to Selenium: {e}")
+                if self.selenium_fallback:
+                    KHCJudgmentDownloader(self.download_dir, resume=True, incremental=self.incremental, base_url=self.base_url, state=self.current_state, metrics=self.metrics, governor=self.governor, **self.fallback_options).run()
+                return self.stats
+            if self.fallback_units and self.selenium_fallback: self.run_selenium_fallback()
+            # Keep progress while anything is left to do, so --resume picks up only the failed units
+            if not self.incremental and not self.fallback_units and not self.failed_units: self.current_state.clear()
+            self.logger.info("\n" + "=" * 80)
+            self.logger.info("FINAL DOWNLOAD SUMMARY:")
+            self.logger.info("=" * 80)
+            self.logger.info(f"Categories processed: {self.stats['categories_processed']}")
+            self.logger.info(f"Total years processed: {self.stats['total_years']}")
+            self.logger.info(f"Total months processed: {self.stats['total_months']}")
+            self.logger.info(f"Total cases processed: {self.stats['total_cases']}")
+            self.logger.info(f"Total files downloaded: {self.stats['total_files']}")
+            self.logger.info(f"Units handed to Selenium: {len(self.fallback_units)}")
+            self.logger.info(f"Units failed: {len(self.failed_units)}")
+            self.logger.info(f"Total time taken: {datetime.now() - start_time}")
+            self.logger.info(f"Content store: {self.content_store.summary()}")
+            self.logger.info(f"Request governor: {self.governor.summary()}")
+            self.log_metrics()
         except Exception as e:
             self.logger.error(f"Fatal error in main process: {e}")
             self.logger.info("Download state saved. You can resume later using resume=True")
-        finally: time.sleep(2), self.driver.quit()
+        finally:
+            if indexer: indexer.stop()
+            self.metrics.close()
+            self.content_store.close()
+        return self.stats
 
 def main():
-    downloader = KHCJudgmentDownloader(resume=True)
-    downloader.run()
+    parser = argparse.ArgumentParser(description="Download Karnataka High Court judgments")
+    parser.add_argument("--download-dir")
+    parser.add_argument("--category", action="append", help="crawl only this category (repeatable)")
+    parser.add_argument("--year", action="append", help="crawl only this year (repeatable)")
+    parser.add_argument("--worker-id", help="identity in the lease table (default: hostname-pid)")
+    parser.add_argument("--lease-db", help="shared lease database; workers on the same file split the site between them")
+    parser.add_argument("--lease-seconds", type=float, default=1800)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--replan", action="store_true", help="list categories and years again even if units are already planned")
+    parser.add_argument("--status", action="store_true", help="print the lease table summary and exit")
+    parser.add_argument("--workers", type=int, default=1, help="browsers in this process when not sharding")
+    parser.add_argument("--no-resume", dest="resume", action="store_false")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--download-mode", choices=["browser", "http"], default="browser")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--block-resources", action="store_true")
+    parser.add_argument("--index-workers", type=int, default=0)
+    args = parser.parse_args()
+    download_dir = args.download_dir or os.path.join(os.getcwd(), 'KHC_Judgments')
+    if args.status:
+        lease_db = args.lease_db or os.path.join(download_dir, 'leases.db')
+        print(json.dumps(LeaseStore(lease_db).summary(args.category, args.year) if os.path.exists(lease_db) else {}))
+        return
+    options = dict(resume=args.resume, incremental=args.incremental, download_mode=args.download_mode, headless=args.headless, block_resources=args.block_resources, index_workers=args.index_workers)
+    if args.lease_db or args.worker_id or args.category or args.year:
+        ShardPlanner(download_dir, args.lease_db, args.worker_id, args.lease_seconds, args.max_attempts, args.category, args.year, args.replan, **options).run()
+    elif args.workers > 1:
+        CrawlScheduler(download_dir, workers=args.workers, **options).run()
+    else:
+        KHCJudgmentDownloader(download_dir, **options).run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,253 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+from html import escape
+import argparse, random, threading, time
+
+# Local stand-in for judiciary.karnataka.gov.in/ds_judgment.php: the same table ids (example, example1, example3,
+# example4), Back buttons, OK popups, DataTables paging and PDF links, over a synthetic tree of configurable size.
+# Buttons are real form posts; the page script submits them over AJAX (like the live site) and swaps the content.
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+
+# Just enough of jQuery + DataTables for the crawler: isDataTable, DataTable().page/page.len/page.info/draw,
+# 'draw.dt' events, jQuery.active, the <id>_length select and the <id>_paginate pager.
+DATATABLES_SHIM_JS = """
+(function() {
+    var tables = {};
+    function DataTable(table) {
+        this.table = table;
+        this.rows = Array.from(table.tBodies[0].rows);
+        this.length = parseInt(table.getAttribute('data-page-length') || '10', 10);
+        this.page = 0;
+        this.handlers = [];
+        var self = this, select = document.createElement('select');
+        select.name = table.id + '_length';
+        [10, 25, 50, 100, -1].forEach(function(n) { var o = document.createElement('option'); o.value = String(n); o.text = n === -1 ? 'All' : String(n); select.appendChild(o); });
+        select.value = String(this.length);
+        select.addEventListener('change', function() { self.length = parseInt(select.value, 10); self.page = 0; self.draw(); });
+        this.pager = document.createElement('div');
+        this.pager.id = table.id + '_paginate';
+        table.parentNode.insertBefore(select, table);
+        table.parentNode.insertBefore(this.pager, table.nextSibling);
+        this.draw();
+    }
+    DataTable.prototype.pages = function() { return this.length === -1 ? 1 : Math.max(1, Math.ceil(this.rows.length / this.length)); };
+    DataTable.prototype.info = function() {
+        var start = this.length === -1 ? 0 : this.page * this.length;
+        var end = this.length === -1 ? this.rows.length : Math.min(this.rows.length, start + this.length);
+        return {page: this.page, pages: this.pages(), start: start, end: end, length: this.length, recordsTotal: this.rows.length, recordsDisplay: this.rows.length, serverSide: false};
+    };
+    DataTable.prototype.draw = function() {
+        var self = this, tbody = this.table.tBodies[0], info = this.info();
+        tbody.innerHTML = '';
+        for (var i = info.start; i < info.end; i++) tbody.appendChild(this.rows[i]);
+        if (!this.rows.length) tbody.innerHTML = '<tr><td class="dataTables_empty">No data available in table</td></tr>';
+        var items = ['<li class="paginate_button page-item previous' + (this.page === 0 ? ' disabled' : '') + '"><a href="#" data-page="' + (this.page - 1) + '">Previous</a></li>'];
+        for (var p = 0; p < info.pages; p++) items.push('<li class="paginate_button page-item' + (p === this.page ? ' active' : '') + '"><a href="#" data-dt-idx="' + (p + 1) + '" data-page="' + p + '">' + (p + 1) + '</a></li>');
+        items.push('<li class="paginate_button page-item next' + (this.page >= info.pages - 1 ? ' disabled' : '') + '"><a href="#" data-page="' + (this.page + 1) + '">Next</a></li>');
+        this.pager.innerHTML = '<ul class="pagination">' + items.join('') + '</ul>';
+        this.pager.querySelectorAll('a').forEach(function(a) {
+            a.addEventListener('click', function(e) { e.preventDefault(); if (!a.parentNode.classList.contains('disabled')) { self.page = parseInt(a.getAttribute('data-page'), 10); self.draw(); } });
+        });
+        setTimeout(function() { self.handlers.forEach(function(h) { h(); }); }, 0);
+    };
+    function api(dt) {
+        var a = {draw: function() { dt.draw(); return a; }};
+        a.page = function(n) { if (n === undefined) return dt.page; dt.page = Math.max(0, Math.min(n, dt.pages() - 1)); return a; };
+        a.page.info = function() { return dt.info(); };
+        a.page.len = function(n) { if (n === undefined) return dt.length; dt.length = n; dt.page = 0; return a; };
+        return a;
+    }
+    function jQuery(selector) {
+        var el = typeof selector === 'string' ? document.querySelector(selector) : selector;
+        return {
+            on: function(event, handler) { if (event.split('.')[0] === 'draw' && el && tables[el.id]) tables[el.id].handlers.push(handler); return this; },
+            DataTable: function() { return api(tables[el.id]); }
+        };
+    }
+    jQuery.active = 0;
+    jQuery.fn = {dataTable: {isDataTable: function(selector) { var el = document.querySelector(selector); return !!(el && tables[el.id] && tables[el.id].table === el); }}};
+    window.jQuery = window.$ = jQuery;
+    function init() { document.querySelectorAll('table.dt').forEach(function(t) { tables[t.id] = new DataTable(t); }); }
+    document.addEventListener('submit', function(e) {
+        var form = e.target;
+        e.preventDefault();
+        jQuery.active++;
+        fetch(form.action, {method: 'POST', body: new URLSearchParams(new FormData(form, e.submitter)), headers: {'X-Requested-With': 'XMLHttpRequest'}})
+            .then(function(r) { return r.text().then(function(text) { if (!r.ok) throw new Error('HTTP ' + r.status); return text; }); })
+            .then(function(html) { document.getElementById('content').innerHTML = html; init(); })
+            .catch(function(err) { document.getElementById('content').insertAdjacentHTML('afterbegin', '<div class="modal popup" id="error" style="display:block"><p>' + err + '</p><button onclick="document.getElementById(\\'error\\').remove()">OK</button></div>'); })
+            .finally(function() { jQuery.active--; });
+    });
+    document.addEventListener('DOMContentLoaded', init);
+})();
+"""
+
+
+class MockSite:
+    def __init__(self, categories=3, years=3, months=2, cases=5, pdfs=1, pdf_kb=20, page_length=10,
+                 latency_ms=0, jitter_ms=0, fail_rate=0.0, pdf_fail_rate=0.0, popup_rate=0.0, seed=0):
+        self.categories = [f"Category {chr(ord('A') + i % 26)}{i // 26 or ''}" for i in range(categories)]
+        self.years = [str(2024 - i) for i in range(years)]
+        self.months = MONTHS[:months]
+        self.cases = cases
+        self.pdfs = pdfs
+        self.pdf_kb = pdf_kb
+        self.page_length = page_length
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.pdf_fail_rate = pdf_fail_rate
+        self.popup_rate = popup_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = 0
+
+    def chance(self, rate):
+        with self.random_lock:
+            return rate > 0 and self.random.random() < rate
+
+    def delay(self):
+        if self.latency_ms or self.jitter_ms:
+            with self.random_lock: jitter = self.random.uniform(0, self.jitter_ms)
+            time.sleep((self.latency_ms + jitter) / 1000)
+
+    def case_titles(self, category, year, month=None):
+        code = "".join(word[0] for word in category.split())
+        offset = (self.months.index(month) * self.cases) if month else 0
+        return [f"{code} {offset + i + 1}/{year}" for i in range(self.cases)]
+
+    def pdf_names(self, category, year, month, case_idx):
+        slug = f"{self.categories.index(category)}_{year}_{month or 'all'}_{case_idx}"
+        return [f"{slug}_{i + 1}.pdf" for i in range(self.pdfs)]
+
+    def total_cases(self):
+        return len(self.categories) * len(self.years) * max(1, len(self.months)) * self.cases
+
+    def form(self, fields, buttons_html):
+        hidden = "".join(f'<input type="hidden" name="{escape(k)}" value="{escape(v)}">' for k, v in fields.items())
+        return f'<form method="post" action="/ds_judgment.php">{hidden}{buttons_html}</form>'
+
+    def button_table(self, table_id, fields, name, rows):
+        body = "".join(f'<tr><td>{idx + 1}</td><td><button type="submit" name="{name}" value="{escape(value)}">{escape(text)}</button></td></tr>' for idx, (value, text) in enumerate(rows))
+        table = f'<table id="{table_id}" class="dt" data-page-length="{self.page_length}"><thead><tr><th>#</th><th>{name.title()}</th></tr></thead><tbody>{body}</tbody></table>'
+        return self.form(fields, table)
+
+    def back_button(self, fields):
+        return self.form(fields, '<button type="submit" class="btn">Back</button>')
+
+    def popup(self):
+        if not self.chance(self.popup_rate): return ""
+        return '<div class="modal popup" id="notice" style="display:block"><p>Notice: judgments are published as received.</p><button onclick="document.getElementById(\'notice\').remove()">OK</button></div>'
+
+    def render(self, fields):
+        category, year, month, case = (fields.get(k) for k in ("category", "year", "month", "case"))
+        if category not in self.categories:
+            return self.button_table("example", {}, "category", [(c, c) for c in self.categories])
+        if year not in self.years:
+            rows = [(y, f"{y} [{max(1, len(self.months)) * self.cases}]") for y in self.years]
+            return self.back_button({}) + self.button_table("example1", {"category": category}, "year", rows)
+        if self.months and month not in self.months:
+            rows = [(m, f"{m} [{self.cases}]") for m in self.months]
+            return self.back_button({"category": category}) + self.button_table("example3", {"category": category, "year": year}, "month", rows)
+        parent = {"category": category, "year": year, **({"month": month} if self.months else {})}
+        titles = self.case_titles(category, year, month)
+        if case not in titles:
+            back = {"category": category, **({"year": year} if self.months else {})}
+            return self.back_button(back) + self.button_table("example4", parent, "case", [(t, t) for t in titles])
+        links = "".join(f'<tr><td>Judgment {i + 1}</td><td><a href="/pdf/{name}">{name}</a></td></tr>' for i, name in enumerate(self.pdf_names(category, year, month, titles.index(case))))
+        return self.back_button(parent) + f'<table id="judgments"><tbody>{links}</tbody></table>'
+
+    def pdf_bytes(self, name):
+        header = f"%PDF-1.4\n% synthetic judgment {name}\n".encode()
+        filler = (f"BT /F1 12 Tf ({name}) Tj ET\n" * 64).encode()
+        body = (filler * (self.pdf_kb * 1024 // len(filler) + 1))[:max(0, self.pdf_kb * 1024 - len(header))]
+        return header + body + b"\n%%EOF\n"
+
+    def page(self, content):
+        return f'<!DOCTYPE html><html><head><title>Judgments</title><script src="/static/datatables-shim.js"></script></head><body><div id="content">{content}</div></body></html>'
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    site = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body, content_type="text/html; charset=utf-8", extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items(): self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, fields):
+        self.site.requests += 1
+        self.site.delay()
+        if self.site.chance(self.site.fail_rate):
+            return self.send(500, b"Internal Server Error", "text/plain")
+        content = self.site.popup() + self.site.render(fields)
+        if self.headers.get("X-Requested-With") != "XMLHttpRequest": content = self.site.page(content)
+        self.send(200, content.encode())
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/static/datatables-shim.js":
+            return self.send(200, DATATABLES_SHIM_JS.encode(), "application/javascript")
+        if path.startswith("/pdf/"):
+            self.site.requests += 1
+            self.site.delay()
+            if self.site.chance(self.site.pdf_fail_rate):
+                return self.send(503, b"Service Unavailable", "text/plain")
+            name = path.rsplit("/", 1)[-1]
+            return self.send(200, self.site.pdf_bytes(name), "application/pdf", {"Content-Disposition": f'attachment; filename="{name}"'})
+        if path in ("/", "/ds_judgment.php"):
+            return self.respond({})
+        self.send(404, b"Not Found", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        fields = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        self.respond(fields)
+
+
+def start_server(site, host="127.0.0.1", port=0):
+    handler = type("BoundMockHandler", (MockHandler,), {"site": site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/ds_judgment.php"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the KHC judgment site")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--months", type=int, default=2, help="months per year; 0 lists cases directly under the year")
+    parser.add_argument("--cases", type=int, default=5, help="cases per month (or per year without months)")
+    parser.add_argument("--pdfs", type=int, default=1, help="PDFs per case")
+    parser.add_argument("--pdf-kb", type=int, default=20)
+    parser.add_argument("--page-length", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of page requests answered with HTTP 500")
+    parser.add_argument("--pdf-fail-rate", type=float, default=0.0, help="fraction of PDF requests answered with HTTP 503")
+    parser.add_argument("--popup-rate", type=float, default=0.0, help="fraction of pages that open with an OK popup")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    site = MockSite(args.categories, args.years, args.months, args.cases, args.pdfs, args.pdf_kb, args.page_length,
+                    args.latency_ms, args.jitter_ms, args.fail_rate, args.pdf_fail_rate, args.popup_rate, args.seed)
+    server, url = start_server(site, args.host, args.port)
+    print(f"Mock KHC site at {url} ({site.total_cases()} cases)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
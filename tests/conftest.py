@@ -0,0 +1,19 @@
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mock_site
+
+
+@pytest.fixture
+def serve():
+    # serve(site) -> base URL of a running mock site; every server is shut down after the test
+    servers = []
+    def start(site):
+        server, url = mock_site.start_server(site)
+        servers.append(server)
+        return url
+    yield start
+    for server in servers: server.shutdown()
@@ -0,0 +1,94 @@
+import glob, os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("lxml")
+
+from file import AsyncKHCCrawler, RequestGovernor
+from mock_site import MockSite
+
+
+def governor(retries=3):
+    # Production retries without the waiting: no pacing, near-zero backoff, a breaker that never opens
+    return RequestGovernor(max_rate=None, adaptive=False, retries=retries, backoff_base=0.001, failure_threshold=10 ** 6)
+
+
+def crawl(download_dir, url, retries=3, **options):
+    crawler = AsyncKHCCrawler(str(download_dir), base_url=url, selenium_fallback=False, governor=governor(retries), **options)
+    return crawler, crawler.run()
+
+
+def pdfs_on_disk(download_dir):
+    return sorted(os.path.relpath(path, download_dir) for path in glob.glob(os.path.join(str(download_dir), "*", "**", "*.pdf"), recursive=True))
+
+
+def test_full_crawl_downloads_every_pdf_and_clears_state(tmp_path, serve):
+    site = MockSite(categories=2, years=2, months=2, cases=3, pdfs=2, pdf_kb=1)
+    crawler, stats = crawl(tmp_path, serve(site))
+    assert stats["total_cases"] == site.total_cases() == 24
+    assert stats["total_files"] == 48
+    assert len(pdfs_on_disk(tmp_path)) == 48
+    assert crawler.failed_units == [] and crawler.fallback_units == []
+    assert len(crawler.current_state) == 0
+
+
+def test_months_optional(tmp_path, serve):
+    site = MockSite(categories=1, years=2, months=0, cases=4, pdf_kb=1)
+    _, stats = crawl(tmp_path, serve(site))
+    assert stats["total_cases"] == 8 and stats["total_months"] == 0
+    assert len(pdfs_on_disk(tmp_path)) == 8
+
+
+def test_incremental_only_fetches_new_cases(tmp_path, serve):
+    site = MockSite(categories=2, years=2, months=0, cases=3, pdf_kb=1)
+    url = serve(site)
+    _, stats = crawl(tmp_path, url, incremental=True)
+    assert stats["total_files"] == 12
+    first_requests = site.requests
+
+    _, stats = crawl(tmp_path, url, incremental=True)
+    assert stats["total_files"] == 0 and stats["total_years"] == 0
+    # Only the start page and the two category pages: every year's count is unchanged
+    assert site.requests - first_requests == 3
+
+    site.cases = 4
+    _, stats = crawl(tmp_path, url, incremental=True)
+    assert stats["total_files"] == 4
+    assert len(pdfs_on_disk(tmp_path)) == 16
+
+
+def test_failed_pages_keep_state_and_resume_finishes(tmp_path, serve):
+    # seed 2 lets the start page through (it is the first draw); later draws race between concurrent requests
+    site = MockSite(categories=2, years=3, months=2, cases=3, pdf_kb=1, fail_rate=0.35, seed=2)
+    url = serve(site)
+    crawler, _ = crawl(tmp_path, url, retries=0)
+    assert crawler.failed_units
+    assert len(crawler.current_state) > 0
+    for category_name, year_text in crawler.failed_units:
+        if year_text is not None:
+            assert f"count_{category_name}_{year_text}" not in crawler.current_state
+            assert f"{category_name}_{year_text}_completed" not in crawler.current_state
+
+    site.fail_rate = 0.0
+    crawler, _ = crawl(tmp_path, url, resume=True)
+    assert crawler.failed_units == []
+    assert len(pdfs_on_disk(tmp_path)) == site.total_cases()
+    assert len(crawler.current_state) == 0
+
+
+def test_failed_pdfs_are_retried_by_the_governor(tmp_path, serve):
+    site = MockSite(categories=1, years=2, months=2, cases=3, pdf_kb=1, pdf_fail_rate=0.3, seed=3)
+    crawler, stats = crawl(tmp_path, serve(site), retries=8)
+    assert crawler.failed_units == []
+    assert stats["total_files"] == 12
+
+
+def test_empty_or_short_tables_are_left_to_selenium(tmp_path):
+    from file import PageParseError
+    crawler = AsyncKHCCrawler(str(tmp_path), base_url="http://site/", selenium_fallback=False)
+    row = '<tr><td>1</td><td><form method="post"><button>CA 1/2024</button></form></td></tr>'
+    with pytest.raises(PageParseError): crawler.node_buttons('<table id="example1"><tbody></tbody></table>', "example1", "http://site/")
+    with pytest.raises(PageParseError): crawler.node_buttons(f'<table id="example4"><tbody>{row}</tbody></table>', "example4", "http://site/", 3, column=1)
+    assert len(crawler.node_buttons(f'<table id="example4"><tbody>{row}</tbody></table>', "example4", "http://site/", 1, column=1)) == 1
+    assert crawler.node_buttons('<table id="example4"><tbody></tbody></table>', "example4", "http://site/", 0, column=1) == []
@@ -0,0 +1,51 @@
+import os
+
+from file import ContentStore
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f: f.write(data)
+    return str(path)
+
+
+def test_same_content_is_stored_once_and_linked(tmp_path):
+    store = ContentStore(str(tmp_path))
+    first, second = tmp_path / "A" / "2021" / "x.pdf", tmp_path / "B" / "2021" / "x.pdf"
+    os.makedirs(first.parent); os.makedirs(second.parent)
+    sha256, is_new = store.add(write(tmp_path / "one.part", b"%PDF judgment"), str(first), "http://site/x.pdf")
+    assert is_new
+    assert store.add(write(tmp_path / "two.part", b"%PDF judgment"), str(second), "http://site/y.pdf") == (sha256, False)
+    assert not os.path.exists(tmp_path / "one.part") and not os.path.exists(tmp_path / "two.part")
+    assert os.path.samefile(first, second) and os.path.samefile(first, store.object_path(sha256))
+    assert store.summary() == {"files": 2, "unique": 1, "stored_bytes": 13, "saved_bytes": 13}
+
+
+def test_add_replaces_a_different_file_at_dst(tmp_path):
+    store = ContentStore(str(tmp_path))
+    dst = write(tmp_path / "A" / "x.pdf", b"stale partial download")
+    sha256, _ = store.add(write(tmp_path / "new.part", b"%PDF fresh"), dst, "http://site/x.pdf")
+    assert open(dst, "rb").read() == b"%PDF fresh"
+    assert os.path.samefile(dst, store.object_path(sha256))
+    assert not [name for name in os.listdir(tmp_path / "A") if name.endswith(".link")]
+
+
+def test_place_links_a_known_url_without_downloading(tmp_path):
+    store = ContentStore(str(tmp_path))
+    os.makedirs(tmp_path / "A"); os.makedirs(tmp_path / "B")
+    sha256, _ = store.add(write(tmp_path / "x.part", b"%PDF judgment"), str(tmp_path / "A" / "x.pdf"), "http://site/x.pdf")
+    assert store.place("http://site/x.pdf", str(tmp_path / "B" / "x.pdf")) == sha256
+    assert os.path.samefile(tmp_path / "A" / "x.pdf", tmp_path / "B" / "x.pdf")
+    assert store.place("http://site/unknown.pdf", str(tmp_path / "B" / "y.pdf")) is None
+    assert not os.path.exists(tmp_path / "B" / "y.pdf")
+    assert store.summary()["files"] == 2
+
+
+def test_objects_after_lists_each_object_with_a_path(tmp_path):
+    store = ContentStore(str(tmp_path))
+    os.makedirs(tmp_path / "A")
+    for name in ("x", "y"):
+        store.add(write(tmp_path / f"{name}.part", name.encode()), str(tmp_path / "A" / f"{name}.pdf"))
+    rows = store.objects_after(0, 10)
+    assert [path for _, _, path in rows] == [os.path.join("A", "x.pdf"), os.path.join("A", "y.pdf")]
+    assert store.objects_after(rows[0][0], 10) == rows[1:]
@@ -0,0 +1,61 @@
+import pytest
+
+from file import CASE_NUMBER_RE, JUDGMENT_DATE_RE, JUSTICE_RE, extract_judgment
+
+
+@pytest.mark.parametrize("line, judges", [
+    ("THE HON'BLE MR. JUSTICE S.R. KRISHNA KUMAR", ["S.R. KRISHNA KUMAR"]),
+    ("THE HON’BLE MRS. JUSTICE B V NAGARATHNA", ["B V NAGARATHNA"]),
+    ("THE HON'BLE CHIEF JUSTICE ALOK ARADHE", ["ALOK ARADHE"]),
+    ("THE HON'BLE MR. JUSTICE A.B. KUMAR AND THE HON'BLE MRS. JUSTICE C. DEVI", ["A.B. KUMAR", "C. DEVI"]),
+    ("THE HON'BLE MR. JUSTICE A.B. KUMAR WRIT PETITION NO.12345 OF 2020", ["A.B. KUMAR"]),
+    ("HON'BLE MR.JUSTICE P.S. DINESH KUMAR CRL.P NO. 101/2019", ["P.S. DINESH KUMAR"]),
+    ("in the interest of justice and equity", []),
+])
+def test_bench_names(line, judges):
+    assert [match.group(1) for match in JUSTICE_RE.finditer(line)] == judges
+
+
+@pytest.mark.parametrize("line, case_number", [
+    ("WRIT PETITION NO.12345 OF 2020 (GM-RES)", ("WRIT PETITION", "12345", "2020")),
+    ("CRL.P NO. 101/2019", ("CRL.P", "101", "2019")),
+    ("R.F.A. NOS. 7 OF 2018", ("R.F.A.", "7", "2018")),
+])
+def test_case_numbers(line, case_number):
+    assert CASE_NUMBER_RE.search(line).groups() == case_number
+
+
+def test_judgment_date():
+    assert JUDGMENT_DATE_RE.search("DATED THIS THE 5TH DAY OF JANUARY, 2021").groups() == ("5", "JANUARY", "2021")
+
+
+def make_pdf(path, lines):
+    # A one-page PDF with one text line per entry, enough for pypdf's text extraction
+    content = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+               f"<< /Length {len(content)} >>\nstream\n{content}\nendstream", "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode() + b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+    return str(path)
+
+
+def test_extract_judgment_reads_the_header(tmp_path):
+    pytest.importorskip("pypdf")
+    path = make_pdf(tmp_path / "a.pdf", ["IN THE HIGH COURT OF KARNATAKA AT BENGALURU", "DATED THIS THE 5TH DAY OF JANUARY, 2021", "BEFORE",
+                                         "THE HON'BLE MR. JUSTICE ARAVIND KUMAR", "WRIT PETITION NO.12345 OF 2020", "The award is set aside."])
+    doc = extract_judgment(path)
+    assert doc["pages"] == 1 and "award is set aside" in doc["text"]
+    assert (doc["case_number"], doc["judgment_date"], doc["bench"]) == ("WRIT PETITION 12345/2020", "2021-01-05", "ARAVIND KUMAR")
+
+
+def test_extract_judgment_reports_unreadable_files(tmp_path):
+    pytest.importorskip("pypdf")
+    (tmp_path / "bad.pdf").write_bytes(b"%PDF-1.4 garbage")
+    assert "error" in extract_judgment(str(tmp_path / "bad.pdf"))
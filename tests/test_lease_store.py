@@ -0,0 +1,90 @@
+import multiprocessing, time
+
+from file import LeaseStore
+
+UNITS = [(f"Category {c}", str(2020 + y)) for c in range(4) for y in range(5)]
+
+
+def test_plan_is_idempotent(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    assert leases.plan(UNITS) == 20
+    assert leases.plan(UNITS) == 0
+    assert leases.count() == 20
+    assert leases.count(["Category 1"], ["2021", "2022"]) == 2
+
+
+def test_acquire_hands_out_each_unit_once(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.plan(UNITS)
+    seen = []
+    while True:
+        lease = leases.acquire(f"w{len(seen) % 3}", 60)
+        if lease is None: break
+        assert lease[2] is None
+        seen.append(lease[:2])
+    assert sorted(seen) == sorted(UNITS)
+    assert leases.summary() == {"leased": 20}
+
+
+def test_acquire_filters_by_category_and_year(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.plan(UNITS)
+    assert leases.acquire("w", 60, ["Category 2"], ["2023"])[:2] == ("Category 2", "2023")
+    assert leases.acquire("w", 60, ["Category 2"], ["2023"]) is None
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.plan(UNITS[:1])
+    assert leases.acquire("dead", 0.05) == (*UNITS[0], None)
+    assert leases.acquire("live", 60) is None
+    time.sleep(0.1)
+    assert leases.acquire("live", 60) == (*UNITS[0], "dead")
+    assert not leases.renew("dead", *UNITS[0], 60)
+    assert leases.renew("live", *UNITS[0], 60)
+
+
+def test_fail_requeues_until_attempts_run_out(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.plan(UNITS[:1])
+    for attempt in range(2):
+        leases.acquire("w", 60)
+        leases.fail("w", *UNITS[0], "boom", max_attempts=2)
+    assert leases.summary() == {"failed": 1}
+    assert leases.acquire("w", 60) is None
+
+
+def test_release_returns_unfinished_leases(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.plan(UNITS[:2])
+    leases.acquire("w", 60)
+    leases.complete("w", *leases.acquire("w", 60)[:2])
+    assert leases.release("w") == 1
+    assert leases.summary() == {"pending": 1, "done": 1}
+
+
+def drain(path, worker, lease_seconds=60):
+    # One worker process: takes and finishes units until none are left
+    leases = LeaseStore(path)
+    taken = []
+    while True:
+        lease = leases.acquire(worker, lease_seconds)
+        if lease is None: return taken
+        taken.append(lease)
+        time.sleep(0.002)
+        leases.complete(worker, *lease[:2])
+
+
+def test_worker_processes_split_the_table(tmp_path):
+    path = str(tmp_path / "leases.db")
+    LeaseStore(path).plan(UNITS)
+    # w0 dies holding a short lease; the unit comes back once the lease expires, to a pool worker or to a late one
+    abandoned = LeaseStore(path).acquire("w0", 0.5)[:2]
+    with multiprocessing.get_context("spawn").Pool(5) as pool:
+        results = pool.starmap(drain, [(path, f"w{i}") for i in range(1, 6)])
+    time.sleep(0.6)
+    results.append(drain(path, "w9"))
+    leases = [lease for result in results for lease in result]
+    assert sorted(lease[:2] for lease in leases if lease[2] is None) == sorted(set(UNITS) - {abandoned})
+    assert [(lease[:2], lease[2]) for lease in leases if lease[2] is not None] == [(abandoned, "w0")]
+    assert LeaseStore(path).summary() == {"done": 20}
@@ -0,0 +1,91 @@
+import threading, time
+
+import pytest
+
+from file import HTTPStatusError, RequestGovernor
+
+
+def peak_in_flight(governor, calls=10, seconds=0.02):
+    lock = threading.Lock()
+    current, peak = [0], [0]
+    def work():
+        with lock:
+            current[0] += 1
+            peak[0] = max(peak[0], current[0])
+        time.sleep(seconds)
+        with lock: current[0] -= 1
+    threads = [threading.Thread(target=governor.call, args=("host", work)) for _ in range(calls)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return peak[0]
+
+
+@pytest.mark.parametrize("adaptive", [True, False])
+def test_concurrency_is_capped(adaptive):
+    governor = RequestGovernor(max_concurrency=2, max_rate=None, start_rate=1000, adaptive=adaptive)
+    assert peak_in_flight(governor) <= 2
+
+
+def test_unpaced_governor_still_runs_calls_in_parallel():
+    assert peak_in_flight(RequestGovernor(max_concurrency=4, adaptive=False)) == 4
+
+
+def test_rate_never_exceeds_max_rate():
+    governor = RequestGovernor(max_rate=50.0, start_rate=40.0)
+    for _ in range(30): governor.call("host", lambda: None)
+    assert governor.summary()["host"]["rate"] <= 50.0
+
+
+def test_rate_grows_in_slow_start_and_halves_on_errors():
+    governor = RequestGovernor(max_rate=None, start_rate=5.0, retries=0)
+    for _ in range(5): governor.call("host", time.sleep, 0.01)
+    assert governor.summary()["host"]["rate"] == 10.0
+    governor.call("host", lambda: False, ok=bool)
+    assert governor.summary()["host"]["rate"] == 5.0
+
+
+def test_failed_results_are_retried_until_ok():
+    results = iter([False, False, True])
+    calls = []
+    def flaky():
+        calls.append(1)
+        return next(results)
+    governor = RequestGovernor(max_rate=None, adaptive=False, backoff_base=0.001)
+    assert governor.call("host", flaky, ok=bool) is True
+    assert len(calls) == 3
+
+
+def test_gives_up_after_retries_and_returns_the_last_result():
+    governor = RequestGovernor(max_rate=None, adaptive=False, retries=2, backoff_base=0.001)
+    calls = []
+    assert governor.call("host", lambda: calls.append(1), ok=bool) is None
+    assert len(calls) == 3
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+    def missing():
+        calls.append(1)
+        raise HTTPStatusError(404, "Not Found")
+    governor = RequestGovernor(max_rate=None, adaptive=False, backoff_base=0.001)
+    with pytest.raises(HTTPStatusError): governor.call("host", missing)
+    assert len(calls) == 1
+    # A 404 says nothing about the host's health
+    assert governor.hosts["host"]["failures"] == 0
+
+
+def test_consecutive_failures_open_the_circuit_until_a_probe_succeeds():
+    governor = RequestGovernor(max_rate=None, adaptive=False, retries=0, failure_threshold=3, open_seconds=0.1)
+    for _ in range(3): governor.call("host", lambda: False, ok=bool)
+    assert governor.summary()["host"]["circuit"] == "open"
+    assert governor.reserve("host") > 0
+    time.sleep(0.15)
+    assert governor.call("host", lambda: True, ok=bool) is True
+    assert governor.summary()["host"]["circuit"] == "closed"
+
+
+def test_hosts_are_governed_separately():
+    governor = RequestGovernor(max_rate=None, adaptive=False, retries=0, failure_threshold=1, open_seconds=60)
+    governor.call("down", lambda: False, ok=bool)
+    assert governor.reserve("down") > 0
+    assert governor.reserve("up") == 0